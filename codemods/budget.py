@@ -0,0 +1,94 @@
+import contextlib
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from types import FrameType
+from typing import Iterator, Optional
+
+import libcst as cst
+from libcst.codemod import SkipFile, VisitorBasedCodemodCommand
+
+from codemods.pipeline import PipelineCodemodCommand
+
+
+@dataclass(frozen=True)
+class Overrun:
+    # Step of the file's processing when its budget was exceeded, with the time elapsed
+    # and the nodes visited until then
+    phase: str
+    seconds: float
+    nodes: int
+
+
+class BudgetExceeded(SkipFile):
+    def __init__(self, overrun: Overrun):
+        super().__init__(
+            f"Exceeded its budget while {overrun.phase}, after {overrun.seconds:.1f} seconds "
+            f"and {overrun.nodes} nodes."
+        )
+
+        self.overrun = overrun
+
+
+class Budget:
+    # Wall-clock time and number of visited nodes allowed to process a file. The time is
+    # checked at each visited node and, from the main thread, by a timer interrupting the
+    # steps which don't visit nodes, i.e. parsing, or a hook stuck on a single node
+    def __init__(self, max_seconds: Optional[float] = None, max_nodes: Optional[int] = None):
+        self.max_seconds = max_seconds
+        self.max_nodes = max_nodes
+        self.phase = "reading"
+        self.nodes = 0
+        self.start = time.monotonic()
+        self.deadline = None if max_seconds is None else self.start + max_seconds
+
+    def exceeded(self) -> BudgetExceeded:
+        return BudgetExceeded(Overrun(self.phase, time.monotonic() - self.start, self.nodes))
+
+    def limit(self, command: VisitorBasedCodemodCommand) -> None:
+        # Counts the nodes visited by the command, raising BudgetExceeded when over budget
+        if self.max_nodes is None and self.deadline is None:
+            return
+
+        if isinstance(command, PipelineCodemodCommand):
+            command.instruments.append(self.limit)
+            return
+
+        on_visit = command.on_visit
+
+        def limited_on_visit(node: cst.CSTNode) -> bool:
+            self.nodes += 1
+
+            if (self.max_nodes is not None and self.nodes > self.max_nodes) or (
+                self.deadline is not None and time.monotonic() > self.deadline
+            ):
+                raise self.exceeded()
+
+            return on_visit(node)
+
+        setattr(command, "on_visit", limited_on_visit)
+
+    @contextlib.contextmanager
+    def watchdog(self) -> Iterator[None]:
+        # Interrupts the code run in the context when the time budget is exceeded, signals
+        # are only delivered to the main thread
+        if (
+            self.max_seconds is None
+            or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()
+        ):
+            yield
+            return
+
+        def timeout(signum: int, frame: Optional[FrameType]) -> None:
+            raise self.exceeded()
+
+        previous_handler = signal.signal(signal.SIGALRM, timeout)
+        signal.setitimer(signal.ITIMER_REAL, self.max_seconds)
+
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
@@ -0,0 +1,173 @@
+import functools
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+if TYPE_CHECKING:
+    from libcst.codemod import VisitorBasedCodemodCommand
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "python-codemods",
+)
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Prefix of the cache entries, followed by the warnings of the command as a JSON line and,
+# for the changed files, their new content
+UNCHANGED = b"="
+CHANGED = b"+"
+
+
+@functools.lru_cache(maxsize=None)
+def source_version() -> str:
+    # Hash of the codemods package's sources and of the LibCST version, any change to the
+    # commands invalidates all the cache's entries
+    from libcst._version import __version__ as libcst_version
+
+    digest = hashlib.sha256(libcst_version.encode())
+    package_dir = Path(__file__).parent
+
+    for path in sorted(package_dir.rglob("*")):
+        if path.is_file() and path.suffix in (".py", ".json", ".toml"):
+            digest.update(str(path.relative_to(package_dir)).encode())
+            digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def formatter_version(formatter: Tuple[str, ...]) -> str:
+    # Version printed by the formatter, so upgrading it invalidates the formatted results
+    if not formatter:
+        return ""
+
+    try:
+        return subprocess.run(
+            [formatter[0], "--version"], capture_output=True, check=True
+        ).stdout.decode(errors="replace")
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class ResultCache:
+    def __init__(
+        self,
+        command: Type["VisitorBasedCodemodCommand"],
+        directory: str = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_MAX_SIZE,
+        variant: str = "",
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.prefix = hashlib.sha256(
+            "\0".join(
+                [f"{command.__module__}.{command.__qualname__}", source_version(), variant]
+            ).encode()
+        ).digest()
+
+    def path(self, source: bytes, context: str = "") -> str:
+        # The context is what the command sees of the file besides its source, i.e. its
+        # module and package names resolving its relative imports
+        key = hashlib.sha256(self.prefix + context.encode() + b"\0" + source).hexdigest()
+
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, source: bytes, context: str = "") -> Optional[Tuple[bytes, List[str]]]:
+        # Returns the output of the command for the given source and the warnings it
+        # emitted, None on cache miss
+        path = self.path(source, context)
+
+        try:
+            with open(path, "rb") as f:
+                entry = f.read()
+
+            # Mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            return None
+
+        warnings, _, output = entry[1:].partition(b"\n")
+
+        try:
+            warnings_list = [str(warning) for warning in json.loads(warnings)]
+        except (ValueError, TypeError):
+            return None
+
+        if entry[:1] == UNCHANGED:
+            return source, warnings_list
+        if entry[:1] == CHANGED:
+            return output, warnings_list
+
+        return None
+
+    def put(
+        self, source: bytes, output: bytes, warnings: Sequence[str] = (), context: str = ""
+    ) -> None:
+        path = self.path(source, context)
+        entry = b"%s%s\n%s" % (
+            UNCHANGED if output == source else CHANGED,
+            json.dumps(list(warnings)).encode(),
+            b"" if output == source else output,
+        )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write atomically, the cache is shared between workers and runs
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry)
+
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def entries(self) -> Iterable[Tuple[float, int, str]]:
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def prune(self) -> int:
+        # Evicts the least recently used entries until the cache fits into its maximum
+        # size, returns the number of evicted entries
+        if not os.path.isdir(self.directory):
+            return 0
+
+        entries: List[Tuple[float, int, str]] = sorted(self.entries(), reverse=True)
+        size = sum(entry_size for _, entry_size, _ in entries)
+        evicted = 0
+
+        while entries and size > self.max_size:
+            _, entry_size, path = entries.pop()
+
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+
+            size -= entry_size
+            evicted += 1
+
+        return evicted
@@ -0,0 +1,421 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from codemods import registry
+from codemods.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE
+from codemods.journal import Journal, Progress
+from codemods.paths import IO_THREADS, changed_paths, iter_files, read_paths
+
+if TYPE_CHECKING:
+    from codemods.runner import FileResult
+
+# Command line interface of the runner, LibCST and the commands are only imported once a
+# file may be changed by the command so that runs changing nothing start fast
+
+
+@dataclass
+class Summary:
+    files: int = 0
+    changed: int = 0
+    cached: int = 0
+    skipped: int = 0
+    failed: int = 0
+    # Files codemodded by the previous runs of the journal
+    resumed: int = 0
+
+    def add(self, result: "FileResult") -> None:
+        self.files += 1
+        self.changed += result.changed
+        self.cached += result.cached
+        self.skipped += result.skip_reason is not None
+        self.failed += result.error is not None
+
+    def print(self) -> None:
+        print(f"Finished codemodding {self.files} files!", file=sys.stderr)
+        print(
+            f" - Transformed {self.files - self.skipped - self.failed} files successfully.",
+            file=sys.stderr,
+        )
+        print(f" - Changed {self.changed} files.", file=sys.stderr)
+        print(f" - Reused {self.cached} cached results.", file=sys.stderr)
+        print(f" - Skipped {self.skipped} files.", file=sys.stderr)
+        print(f" - Failed to codemod {self.failed} files.", file=sys.stderr)
+
+        if self.resumed:
+            print(f" - Resumed after {self.resumed} files codemodded before.", file=sys.stderr)
+
+
+def print_result(result: "FileResult") -> None:
+    for warning in result.warnings:
+        print(f"WARNING: {result.path}: {warning}", file=sys.stderr)
+
+    if result.error is not None:
+        print(f"Codemodding {result.path} failed:\n{result.error}", file=sys.stderr)
+
+
+def first_match(
+    command: str, files: Iterator[Tuple[str, int]]
+) -> Tuple[List[Tuple[str, int]], bool]:
+    # Reads the files until one may be changed by the command, returns the files read, the
+    # matching one being the last, and if any matched
+    seen = []
+
+    for path, size in files:
+        seen.append((path, size))
+
+        try:
+            with open(path, "rb") as f:
+                if registry.may_match(command, f.read()):
+                    return seen, True
+        except OSError:
+            # Reported as a failure by the runner
+            return seen, True
+
+    return seen, False
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="mod", description="Runs a codemod over files and directories"
+    )
+    parser.add_argument("command", nargs="?", help="Command to run, i.e. wxpython.SizerAddCommand")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Files or directories to codemod, read from the standard input if none or -, "
+        "the files of --lines and --hunks if none is given with them",
+    )
+    parser.add_argument(
+        "-0",
+        "--null",
+        action="store_true",
+        help="Paths read from the standard input are separated by NUL instead of newlines",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Only codemod the files added or modified, staged or not, since the git ref, "
+        "within the paths if any",
+    )
+    parser.add_argument(
+        "--lines",
+        metavar="PATH:RANGES",
+        action="append",
+        help="Only change the code on these lines of the file, i.e. src/frame.py:10-20,35, "
+        "can be repeated. Files without lines are left untouched",
+    )
+    parser.add_argument(
+        "--hunks",
+        metavar="PATCH",
+        type=argparse.FileType("rb"),
+        help="Only change the code on the lines added or modified by this unified diff, i.e. "
+        "of git diff -U0, - for the standard input. Files without lines are left untouched",
+    )
+    parser.add_argument(
+        "--strip",
+        type=int,
+        default=1,
+        help="Number of leading components to strip from the file names of the --hunks diff, "
+        "like patch -p, defaults to 1",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of jobs, defaults to number of cores"
+    )
+    parser.add_argument(
+        "--max-files-per-worker",
+        type=int,
+        help="Replace each worker with a new one after it codemodded this number of files",
+    )
+    parser.add_argument(
+        "--max-worker-rss",
+        type=int,
+        help="Replace each worker with a new one when its resident memory exceeds this number "
+        "of bytes",
+    )
+    parser.add_argument(
+        "--isolate-size",
+        type=int,
+        help="Files bigger than this number of bytes are codemodded by a worker of their own",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=IO_THREADS,
+        help="Number of threads of each job reading the files ahead of the transforms and "
+        f"writing them behind, 0 to read and write each file in turn, defaults to {IO_THREADS}",
+    )
+    parser.add_argument(
+        "--max-file-seconds",
+        type=float,
+        help="Skip, leaving it untouched, a file taking more than this number of seconds",
+    )
+    parser.add_argument(
+        "--max-file-nodes",
+        type=int,
+        help="Skip, leaving it untouched, a file whose transform visits more than this number "
+        "of nodes",
+    )
+    parser.add_argument(
+        "--skip-list",
+        type=argparse.FileType("w"),
+        help="File where to write the files skipped for exceeding their budget as JSON lines",
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help="Record each codemodded file into this journal, skipping the files it recorded "
+        "and left unmodified since, to resume a run which was killed",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Print the files and bytes codemodded per second and the time left",
+    )
+    parser.add_argument(
+        "--no-format", action="store_true", help="Don't format the changed files with black"
+    )
+    parser.add_argument("--include-generated", action="store_true", help="Codemod generated files")
+    parser.add_argument(
+        "--patch",
+        type=argparse.FileType("wb"),
+        help="Don't change the files, write the changes as an unified diff into this file, - for "
+        "the standard output",
+    )
+    parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="Don't change the files, report the code which would be changed as JSON lines",
+    )
+    parser.add_argument(
+        "--scan-output",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="File where to write the scan's report, defaults to the standard output",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time parsing, each hook, matchers and code generation, printing a summary",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=argparse.FileType("w"),
+        help="File where to write each file's profile as JSON lines",
+    )
+    parser.add_argument("--list", action="store_true", help="List the commands and exit")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the results cache")
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the results cache, defaults to {DEFAULT_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="Maximum size in bytes of the results cache, least recently used results are "
+        "evicted first",
+    )
+
+    # The command being optional with --list, paths may only follow options when intermixed
+    args = parser.parse_intermixed_args(argv)
+
+    if args.list:
+        registry.print_commands()
+        return 0
+
+    if args.command is None:
+        parser.error("the following arguments are required: command")
+
+    if not registry.is_registered(args.command):
+        parser.error(f"unknown command {args.command}, see --list")
+
+    if args.journal is not None and (args.patch is not None or args.scan):
+        parser.error("--journal cannot be used with --patch or --scan, which don't change files")
+
+    journal: Optional[Journal] = None
+
+    if args.journal is not None:
+        try:
+            journal = Journal(args.journal, args.command)
+        except (OSError, ValueError) as ex:
+            parser.error(str(ex))
+
+    line_ranges: Optional[Dict[str, List[Tuple[int, int]]]] = None
+
+    if args.lines or args.hunks:
+        from codemods.ranges import (
+            diff_ranges,
+            merge_ranges,
+            parse_file_ranges,
+        )
+
+        file_ranges = []
+
+        try:
+            for spec in args.lines or []:
+                file_ranges.append(parse_file_ranges(spec))
+
+            if args.hunks is not None:
+                file_ranges.extend(diff_ranges(args.hunks.read(), args.strip).items())
+        except ValueError as ex:
+            parser.error(str(ex))
+
+        line_ranges = {}
+
+        for path, ranges in file_ranges:
+            path = os.path.abspath(path)
+            line_ranges[path] = merge_ranges([*line_ranges.get(path, []), *ranges])
+
+    paths: Iterable[str] = args.paths
+
+    if args.since is not None:
+        try:
+            paths = list(changed_paths(args.since, args.paths))
+        except subprocess.CalledProcessError:
+            parser.error(f"cannot list the files changed since {args.since}")
+    elif line_ranges is not None and not args.paths:
+        # The files with lines to change
+        paths = sorted(os.path.relpath(path) for path in line_ranges if os.path.isfile(path))
+    elif not args.paths or args.paths == ["-"]:
+        paths = read_paths(sys.stdin.buffer, b"\0" if args.null else b"\n")
+
+    summary = Summary()
+    files = iter_files(paths)
+
+    if journal is not None:
+        files = journal.pending(files)
+
+    seen, matched = first_match(args.command, files)
+
+    if not matched:
+        # Nothing to change, don't pay for importing LibCST and the commands
+        summary.files = len(seen)
+
+        if journal is not None:
+            summary.resumed = journal.resumed
+            journal.close()
+
+        summary.print()
+
+        return 0
+
+    from codemods.cache import ResultCache, formatter_version
+    from codemods.prefilter import load_command
+    from codemods.profiling import ProfileSummary
+    from codemods.runner import (
+        FORMATTER,
+        PatchOutput,
+        RunOptions,
+        WorkerLimits,
+        run,
+    )
+
+    command = load_command(args.command)
+    options = RunOptions(
+        formatter=[] if args.no_format else FORMATTER,
+        include_generated=args.include_generated,
+        scan=args.scan,
+        profile=args.profile or args.profile_output is not None,
+        diff=args.patch is not None,
+        io_threads=args.io_threads,
+        max_seconds=args.max_file_seconds,
+        max_nodes=args.max_file_nodes,
+        line_ranges=line_ranges,
+    )
+    cache = (
+        None
+        if args.no_cache or options.scan or options.profile
+        else ResultCache(
+            command,
+            directory=args.cache_dir,
+            max_size=args.cache_size,
+            variant="\0".join(
+                [" ".join(options.formatter), formatter_version(tuple(options.formatter))]
+            ),
+        )
+    )
+
+    profile_summary = ProfileSummary()
+
+    limits = WorkerLimits(
+        max_files=args.max_files_per_worker,
+        max_rss=args.max_worker_rss,
+        isolate_size=args.isolate_size,
+    )
+    sizes = dict(itertools.chain(seen, files))
+    progress = Progress(len(sizes), sum(sizes.values())) if args.progress else None
+    # Diffs are written by the workers, without going through this process
+    patch = None
+
+    if args.patch is not None:
+        args.patch.flush()
+        patch = PatchOutput(args.patch.fileno())
+
+    results = run(
+        command, sizes.items(), options, cache=cache, jobs=args.jobs, limits=limits, patch=patch
+    )
+
+    try:
+        for result in results:
+            if progress is not None and (result.warnings or result.error is not None):
+                progress.clear()
+
+            print_result(result)
+            summary.add(result)
+
+            for match in result.matches:
+                args.scan_output.write(json.dumps(asdict(match)) + "\n")
+
+            if result.matches:
+                args.scan_output.flush()
+
+            if result.overrun is not None and args.skip_list is not None:
+                args.skip_list.write(
+                    json.dumps({"file": result.path, **asdict(result.overrun)}) + "\n"
+                )
+
+            if result.profile is not None:
+                profile_summary.add(result.profile)
+
+                if args.profile_output is not None:
+                    args.profile_output.write(json.dumps(asdict(result.profile)) + "\n")
+
+            if journal is not None:
+                journal.record(result)
+
+            if progress is not None:
+                progress.add(sizes[result.path])
+    finally:
+        if journal is not None:
+            summary.resumed = journal.resumed
+            journal.close()
+
+        if progress is not None:
+            progress.close()
+
+    if options.profile:
+        profile_summary.print()
+
+    summary.print()
+
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import stat
+import sys
+import tempfile
+from multiprocessing.connection import Client, Connection
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from codemods import registry
+from codemods.paths import write_file
+
+# Client of the codemods daemon, importing neither LibCST nor the commands. Each request
+# and response is a JSON header followed by the code, both sent as messages over the
+# daemon's Unix socket
+
+# In the user's runtime directory or, without one, in a directory of the user only
+# accessible by them and created by the daemon
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR")
+    or os.path.join(tempfile.gettempdir(), f"python-codemods-{os.getuid()}"),
+    "python-codemods.sock",
+)
+
+
+def check_directory(path: str) -> None:
+    # Raises PermissionError unless the directory belongs to the user, or root, and other
+    # users cannot replace its files, so they cannot pose as the daemon
+    info = os.stat(path)
+
+    if info.st_uid not in (0, os.getuid()) or (
+        info.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and not info.st_mode & stat.S_ISVTX
+    ):
+        raise PermissionError(f"{path} can be changed by other users")
+
+
+def check_socket(path: str) -> None:
+    # Raises PermissionError unless the socket belongs to the user and is only accessible
+    # by them, in a directory other users cannot change
+    info = os.stat(path)
+
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"{path} doesn't belong to the user or is accessible by others")
+
+    check_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def send(connection: Connection, header: Dict[str, Any], data: bytes = b"") -> None:
+    connection.send_bytes(json.dumps(header).encode())
+    connection.send_bytes(data)
+
+
+def receive(connection: Connection) -> Tuple[Dict[str, Any], bytes]:
+    header = json.loads(connection.recv_bytes())
+
+    return header, connection.recv_bytes()
+
+
+def request(
+    header: Dict[str, Any], data: bytes = b"", socket: str = DEFAULT_SOCKET
+) -> Tuple[Dict[str, Any], bytes]:
+    check_socket(socket)
+
+    with Client(socket, family="AF_UNIX") as connection:
+        send(connection, header, data)
+
+        return receive(connection)
+
+
+def transform(
+    command: str,
+    path: str,
+    source: bytes,
+    diff: bool = False,
+    format: bool = True,
+    socket: str = DEFAULT_SOCKET,
+) -> Tuple[Dict[str, Any], bytes]:
+    # Returns the daemon's result, with the same fields of the runner's FileResult, and
+    # the transformed source, or its diff
+    header = {
+        "command": command,
+        "path": path,
+        "cwd": os.getcwd(),
+        "diff": diff,
+        "format": format,
+    }
+
+    return request(header, source, socket)
+
+
+def connect(
+    call: Callable[[], Tuple[Dict[str, Any], bytes]]
+) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    # Returns the call's response, None printing an error if the daemon isn't running
+    try:
+        return call()
+    except (ConnectionRefusedError, FileNotFoundError) as ex:
+        print(
+            f"Cannot connect to the daemon, start it with python -m codemods.daemon: {ex}",
+            file=sys.stderr,
+        )
+
+        return None
+    except PermissionError as ex:
+        print(f"Refusing to connect to the daemon: {ex}", file=sys.stderr)
+
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Runs a codemod on a file, or the standard input, through the codemods "
+        "daemon, printing the transformed source"
+    )
+    parser.add_argument("command", nargs="?", help="Command to run, i.e. wxpython.SizerAddCommand")
+    parser.add_argument(
+        "path", nargs="?", default="-", help="File to codemod, the standard input if - or none"
+    )
+    parser.add_argument(
+        "--stdin-filename",
+        help="Name of the file read from the standard input, i.e. the editor's buffer",
+    )
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument(
+        "--diff", action="store_true", help="Print the changes as an unified diff instead"
+    )
+    output_group.add_argument(
+        "-i", "--in-place", action="store_true", help="Write the changes into the file instead"
+    )
+    parser.add_argument(
+        "--no-format", action="store_true", help="Don't format the changed code with black"
+    )
+    parser.add_argument(
+        "--socket", default=DEFAULT_SOCKET, help=f"Daemon's socket, defaults to {DEFAULT_SOCKET}"
+    )
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon")
+
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        return 0 if connect(lambda: request({"stop": True}, socket=args.socket)) else 2
+
+    if args.command is None:
+        parser.error("the following arguments are required: command")
+
+    if not registry.is_registered(args.command):
+        parser.error(f"unknown command {args.command}")
+
+    if args.path == "-":
+        if args.in_place:
+            parser.error("cannot change the standard input in place")
+
+        path = args.stdin_filename or "<stdin>"
+        source = sys.stdin.buffer.read()
+    else:
+        path = args.path
+
+        with open(path, "rb") as f:
+            source = f.read()
+
+    response = connect(
+        lambda: transform(
+            args.command,
+            path,
+            source,
+            diff=args.diff,
+            format=not args.no_format,
+            socket=args.socket,
+        )
+    )
+
+    if response is None:
+        return 2
+
+    result, output = response
+
+    for warning in result["warnings"]:
+        print(f"WARNING: {path}: {warning}", file=sys.stderr)
+
+    if result["error"] is not None:
+        print(f"Codemodding {path} failed:\n{result['error']}", file=sys.stderr)
+        return 1
+
+    if result["skip_reason"] is not None:
+        print(f"Skipped {path}: {result['skip_reason']}", file=sys.stderr)
+
+    if args.in_place:
+        if output != source:
+            write_file(path, output)
+    else:
+        sys.stdout.buffer.write(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
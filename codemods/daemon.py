@@ -0,0 +1,229 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, replace
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.connection import Connection, Listener
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from codemods import registry
+from codemods.client import (
+    DEFAULT_SOCKET,
+    check_directory,
+    check_socket,
+    receive,
+    send,
+)
+from codemods.prefilter import load_command
+from codemods.runner import (
+    FORMATTER,
+    FileResult,
+    RunOptions,
+    preload,
+    process_source,
+)
+
+# Daemon keeping LibCST, the commands and a pool of workers loaded, transforming the code
+# sent by the clients of codemods.client over a Unix socket
+
+
+def transform_request(
+    name: str, path: str, source: bytes, options: RunOptions, cwd: Optional[str] = None
+) -> Tuple[FileResult, bytes]:
+    # Run by the workers, one request at a time, from the client's directory so paths are
+    # resolved as if the client ran the command. Returns the result and the transformed
+    # source, or its diff
+    if cwd is not None:
+        os.chdir(cwd)
+
+    result, output = process_source(load_command(name), path, source, options)
+
+    if options.diff:
+        return result, result.diff or b""
+
+    return result, source if output is None else output
+
+
+def warm_up() -> None:
+    # Imports the commands in each worker as soon as it starts
+    for name in registry.COMMANDS:
+        preload(load_command(name))
+
+
+class Daemon:
+    def __init__(
+        self,
+        path: str = DEFAULT_SOCKET,
+        options: RunOptions = RunOptions(),
+        jobs: Optional[int] = None,
+    ):
+        self.path = path
+        self.options = options
+        self.jobs = jobs or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.pool = self.start_pool()
+        self.stopping = threading.Event()
+
+    def start_pool(self) -> ProcessPoolExecutor:
+        context = get_context("fork" if "fork" in get_all_start_methods() else None)
+        pool = ProcessPoolExecutor(self.jobs, mp_context=context, initializer=warm_up)
+
+        # Start all the workers now rather than on the first requests
+        for future in [pool.submit(os.getpid) for _ in range(self.jobs)]:
+            future.result()
+
+        return pool
+
+    def transform(self, header: Dict[str, Any], source: bytes) -> Tuple[FileResult, bytes]:
+        path = header.get("path") or "<stdin>"
+        name = header.get("command") or ""
+
+        if not registry.is_registered(name):
+            return FileResult(path, error=f"Unknown command {name}."), b""
+
+        options = replace(
+            self.options,
+            diff=bool(header.get("diff")),
+            formatter=self.options.formatter if header.get("format", True) else [],
+        )
+        pool = self.pool
+
+        try:
+            return pool.submit(
+                transform_request, name, path, source, options, header.get("cwd")
+            ).result()
+        except BrokenProcessPool:
+            # A worker died, i.e. killed when out of memory, replace the pool
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = self.start_pool()
+
+            return FileResult(path, error="Worker exited."), b""
+
+    def handle(self, connection: Connection) -> None:
+        # Answers the client's requests until it closes the connection
+        with connection:
+            while True:
+                try:
+                    header, source = receive(connection)
+                except (EOFError, OSError):
+                    return
+
+                if header.get("stop"):
+                    send(connection, {})
+                    self.stop()
+                    return
+
+                try:
+                    result, output = self.transform(header, source)
+                except Exception:
+                    result, output = FileResult("", error=traceback.format_exc()), b""
+
+                send(connection, asdict(replace(result, diff=None)), output)
+
+    def serve(self) -> None:
+        # The socket's directory is created only accessible by the user
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        check_directory(directory)
+
+        self.remove_stale_socket()
+
+        # Only the user running the daemon can connect to its socket
+        umask = os.umask(0o177)
+
+        try:
+            listener = Listener(self.path, family="AF_UNIX")
+        finally:
+            os.umask(umask)
+
+        with listener:
+            while True:
+                connection = listener.accept()
+
+                if self.stopping.is_set():
+                    connection.close()
+                    break
+
+                threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+        self.pool.shutdown()
+
+    def stop(self) -> None:
+        # Wakes up serve() waiting for a connection with one of its own
+        self.stopping.set()
+
+        with socket.socket(socket.AF_UNIX) as wake_up:
+            wake_up.connect(self.path)
+
+    def remove_stale_socket(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        # Don't take over, or talk to, another user's socket
+        check_socket(self.path)
+
+        probe = socket.socket(socket.AF_UNIX)
+
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"A daemon is already listening on {self.path}")
+        finally:
+            probe.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Keeps the commands loaded to run them quickly for codemods.client"
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"Socket to listen on, defaults to {DEFAULT_SOCKET}",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of workers, defaults to number of cores",
+    )
+    parser.add_argument(
+        "--no-format", action="store_true", help="Don't format the changed code with black"
+    )
+    parser.add_argument("--include-generated", action="store_true", help="Codemod generated files")
+    parser.add_argument(
+        "--max-file-seconds",
+        type=float,
+        help="Leave untouched the code taking more than this number of seconds",
+    )
+
+    args = parser.parse_args(argv)
+    options = RunOptions(
+        formatter=[] if args.no_format else FORMATTER,
+        include_generated=args.include_generated,
+        max_seconds=args.max_file_seconds,
+    )
+    daemon = Daemon(args.socket, options, jobs=args.jobs)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
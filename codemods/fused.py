@@ -0,0 +1,117 @@
+from abc import ABC
+from dataclasses import replace
+from typing import ClassVar, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+from libcst.codemod.visitors import AddImportsVisitor, RemoveImportsVisitor
+from libcst.metadata import ProviderT
+
+
+class FusedCodemodCommand(VisitorBasedCodemodCommand, ABC):
+    # Commands are applied in order to each node, the node returned by a command being the
+    # updated node of the next one, which gives the same result of running them one after
+    # another as long as each command only rewrites the nodes it leaves
+    COMMANDS: ClassVar[Sequence[Type[VisitorBasedCodemodCommand]]] = ()
+
+    def __init__(self, context: CodemodContext):
+        super().__init__(context)
+
+        self.commands = [command(context) for command in self.COMMANDS]
+        self.skipped: List[Optional[cst.CSTNode]] = [None] * len(self.commands)
+        self.hooks: Dict[Tuple[str, ...], List[int]] = {}
+
+    @classmethod
+    def get_inherited_dependencies(cls) -> Tuple[ProviderT, ...]:
+        dependencies = set(super().get_inherited_dependencies())
+
+        for command in cls.COMMANDS:
+            dependencies.update(command.get_inherited_dependencies())
+
+        return tuple(dependencies)
+
+    def transform_module(self, tree: cst.Module) -> cst.Module:
+        tree = super().transform_module(tree)
+
+        # Run the imports' fixes scheduled by each command in the same order they would
+        # run if the commands were executed one after another
+        for command in self.commands:
+            if AddImportsVisitor.CONTEXT_KEY in command.context.scratch:
+                tree = AddImportsVisitor(command.context).transform_module(tree)
+            if RemoveImportsVisitor.CONTEXT_KEY in command.context.scratch:
+                tree = RemoveImportsVisitor(command.context).transform_module(tree)
+
+        return tree
+
+    def transform_module_impl(self, tree: cst.Module) -> cst.Module:
+        # Share the metadata wrapper with all the commands, each command keeps its own
+        # scratch to schedule imports' fixes
+        for command in self.commands:
+            command.context = replace(self.context, scratch={})
+            command.metadata = self.metadata
+
+        return super().transform_module_impl(tree)
+
+    def _indexes(self, *key: str) -> List[int]:
+        # Index of the commands which implements the hook named by the key, commands
+        # with decorated visitors or leave functions are always called
+        indexes = self.hooks.get(key)
+
+        if indexes is None:
+            name = "_".join(key)
+            indexes = [
+                i
+                for i, command in enumerate(self.commands)
+                if getattr(type(command), name, None)
+                is not getattr(cst.CSTTransformer, name, None)
+                or command._matchers
+                or command._extra_visit_funcs
+                or command._extra_leave_funcs
+            ]
+
+            self.hooks[key] = indexes
+
+        return indexes
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        visit_children = False
+        indexes = self._indexes("visit", type(node).__name__)
+
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is not None:
+                continue
+
+            if i not in indexes or command.on_visit(node):
+                visit_children = True
+            else:
+                # The command doesn't want to visit the children of this node
+                self.skipped[i] = node
+
+        return visit_children
+
+    def on_leave(
+        self, original_node: cst.CSTNodeT, updated_node: cst.CSTNodeT
+    ) -> Union[cst.CSTNodeT, cst.RemovalSentinel]:
+        retval: Union[cst.CSTNodeT, cst.RemovalSentinel] = updated_node
+        indexes = self._indexes("leave", type(original_node).__name__)
+
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is original_node:
+                self.skipped[i] = None
+            elif self.skipped[i] is not None:
+                continue
+
+            if i in indexes and isinstance(retval, cst.CSTNode):
+                retval = command.on_leave(original_node, retval)
+
+        return retval
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        for i in self._indexes("visit", type(node).__name__, attribute):
+            if self.skipped[i] is None:
+                self.commands[i].on_visit_attribute(node, attribute)
+
+    def on_leave_attribute(self, original_node: cst.CSTNode, attribute: str) -> None:
+        for i in self._indexes("leave", type(original_node).__name__, attribute):
+            if self.skipped[i] is None:
+                self.commands[i].on_leave_attribute(original_node, attribute)
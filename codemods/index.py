@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from codemods import registry
+from codemods.cache import source_version
+from codemods.paths import iter_files
+
+# Index of the code the wxPython migration would change, mapping each file to the legacy
+# symbols it uses with their positions. Files are only scanned again when their size or
+# modification time changes, and the index is rebuilt when the commands change
+
+INDEX_COMMAND = "wxpython.WxPythonMigrationCommand"
+DEFAULT_INDEX = ".codemods-index.json"
+INDEX_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class Usage:
+    line: int
+    column: int
+    command: str
+    symbol: str
+    code: str
+
+
+@dataclass(frozen=True)
+class IndexedFile:
+    mtime_ns: int
+    size: int
+    usages: Sequence[Usage] = ()
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    # Progress at the end of an update, for burndown charts
+    time: int
+    files: int
+    pending_files: int
+    usages: int
+
+
+@dataclass
+class CommandProgress:
+    files: int = 0
+    usages: int = 0
+
+
+@dataclass(frozen=True)
+class Report:
+    files: int
+    pending_files: int
+    usages: int
+    commands: Dict[str, CommandProgress]
+    symbols: Dict[str, int]
+    history: Sequence[Snapshot] = ()
+
+    def print(self) -> None:
+        migrated = self.files - self.pending_files
+        percent = 100 * migrated / self.files if self.files else 100.0
+
+        print(
+            f"Migrated {migrated}/{self.files} files ({percent:.1f}%), {self.usages} usages "
+            f"left in {self.pending_files} files"
+        )
+
+        if len(self.history) > 1:
+            previous = self.history[-2]
+            print(
+                f"Since {time.strftime('%Y-%m-%d %H:%M', time.localtime(previous.time))}: "
+                f"{self.pending_files - previous.pending_files:+d} files, "
+                f"{self.usages - previous.usages:+d} usages"
+            )
+
+        if not self.commands:
+            return
+
+        width = max(len(name) for name in self.commands)
+
+        print()
+        print(f"{'Command':<{width}}  {'Files':>7}  {'Usages':>7}")
+
+        for name, progress in sorted(self.commands.items()):
+            print(f"{name:<{width}}  {progress.files:>7}  {progress.usages:>7}")
+
+        width = max(len(symbol) for symbol in self.symbols)
+
+        print()
+        print(f"{'Symbol':<{width}}  {'Usages':>7}")
+
+        for symbol, count in sorted(self.symbols.items(), key=lambda item: (-item[1], item[0])):
+            print(f"{symbol:<{width}}  {count:>7}")
+
+
+def usage_symbol(command: str, code: str) -> str:
+    # The first of the command's trigger tokens found in the code, i.e. not the one of a
+    # method call changing its class' code
+    tokens = sorted(registry.trigger_tokens(command) or ())
+    found = [(code.find(token), token) for token in tokens if token in code]
+
+    return min(found)[1] if found else tokens[0] if tokens else code
+
+
+class UsageIndex:
+    def __init__(self, path: str = DEFAULT_INDEX):
+        self.path = path
+        # Files by path relative to the index's directory
+        self.files: Dict[str, IndexedFile] = {}
+        self.history: List[Snapshot] = []
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX) -> "UsageIndex":
+        # An index missing, unreadable or built by other commands' sources is empty
+        index = cls(path)
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        if data.get("format") != INDEX_FORMAT:
+            return index
+
+        index.history = [Snapshot(**snapshot) for snapshot in data["history"]]
+
+        if data.get("version") != source_version():
+            return index
+
+        index.files = {
+            file: IndexedFile(
+                entry["mtime_ns"], entry["size"], [Usage(**usage) for usage in entry["usages"]]
+            )
+            for file, entry in data["files"].items()
+        }
+
+        return index
+
+    def save(self) -> None:
+        data = {
+            "format": INDEX_FORMAT,
+            "version": source_version(),
+            "files": {file: asdict(entry) for file, entry in sorted(self.files.items())},
+            "history": [asdict(snapshot) for snapshot in self.history],
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(self.path)))
+
+    def is_below(self, file: str, roots: Iterable[str]) -> bool:
+        return any(
+            root == os.curdir or file == root or file.startswith(root + os.sep) for root in roots
+        )
+
+    def update(
+        self,
+        files: Iterable[Tuple[str, int]],
+        jobs: Optional[int] = None,
+        roots: Iterable[str] = (),
+    ) -> Tuple[int, Dict[str, str]]:
+        # Scans the files added or modified since the last update, found below the roots
+        # they're listed from, and forgets the ones which don't exist anymore or aren't
+        # listed below the roots. Returns the number of scanned files and the failed ones'
+        # errors, by path relative to the index's directory
+        from codemods.prefilter import load_command
+        from codemods.runner import RunOptions, run
+
+        stats: Dict[str, os.stat_result] = {}
+        stale: List[Tuple[str, int]] = []
+        keys: Dict[str, str] = {}
+
+        for path, size in files:
+            file = keys[path] = self.key(path)
+            stats[file] = os.stat(path)
+            entry = self.files.get(file)
+
+            if (
+                entry is None
+                or entry.mtime_ns != stats[file].st_mtime_ns
+                or entry.size != stats[file].st_size
+            ):
+                stale.append((path, size))
+
+        root_keys = [self.key(root) for root in roots]
+        directory = os.path.dirname(os.path.abspath(self.path))
+
+        for file in set(self.files) - set(stats):
+            if self.is_below(file, root_keys) or not os.path.exists(os.path.join(directory, file)):
+                del self.files[file]
+
+        errors: Dict[str, str] = {}
+        options = RunOptions(formatter=[], scan=True)
+
+        for result in run(load_command(INDEX_COMMAND), stale, options, jobs=jobs):
+            file = keys[result.path]
+
+            if result.error is not None:
+                errors[file] = result.error
+                self.files.pop(file, None)
+                continue
+
+            self.files[file] = IndexedFile(
+                stats[file].st_mtime_ns,
+                stats[file].st_size,
+                [
+                    Usage(
+                        match.line,
+                        match.column,
+                        match.command,
+                        usage_symbol(match.command, match.old),
+                        match.old,
+                    )
+                    for match in result.matches
+                ],
+            )
+
+        report = self.report()
+        self.history.append(
+            Snapshot(int(time.time()), report.files, report.pending_files, report.usages)
+        )
+
+        return len(stale), errors
+
+    def pending(self, command: Optional[str] = None) -> Dict[str, List[Usage]]:
+        # Files still to be migrated, by all the commands or the given one, with their usages
+        files: Dict[str, List[Usage]] = {}
+
+        for file, entry in sorted(self.files.items()):
+            usages = [u for u in entry.usages if command is None or u.command == command]
+
+            if usages:
+                files[file] = usages
+
+        return files
+
+    def report(self) -> Report:
+        commands: Dict[str, CommandProgress] = defaultdict(CommandProgress)
+        symbols: Dict[str, int] = defaultdict(int)
+        pending_files = usages = 0
+
+        for entry in self.files.values():
+            pending_files += bool(entry.usages)
+            usages += len(entry.usages)
+
+            for command in {usage.command for usage in entry.usages}:
+                commands[command].files += 1
+
+            for usage in entry.usages:
+                commands[usage.command].usages += 1
+                symbols[usage.symbol] += 1
+
+        return Report(
+            files=len(self.files),
+            pending_files=pending_files,
+            usages=usages,
+            commands=dict(commands),
+            symbols=dict(symbols),
+            history=list(self.history),
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Updates the index of the legacy wxPython usages of the files and "
+        "directories, printing the migration's progress"
+    )
+    parser.add_argument("paths", nargs="*", default=["."], help="Files or directories to index")
+    parser.add_argument(
+        "--index", default=DEFAULT_INDEX, help=f"Index file, defaults to {DEFAULT_INDEX}"
+    )
+    parser.add_argument(
+        "--no-update", action="store_true", help="Query the index without updating it"
+    )
+    parser.add_argument(
+        "--files",
+        metavar="COMMAND",
+        nargs="?",
+        const="",
+        help="Print the files still to be migrated, with their usages, by any command or the "
+        "given one",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of jobs, defaults to number of cores"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.files and not registry.is_registered(args.files):
+        parser.error(f"unknown command {args.files}")
+
+    index = UsageIndex.load(args.index)
+    failed = 0
+
+    if not args.no_update:
+        scanned, errors = index.update(iter_files(args.paths), jobs=args.jobs, roots=args.paths)
+        index.save()
+        failed = len(errors)
+
+        for file, error in errors.items():
+            print(f"Indexing {file} failed:\n{error}", file=sys.stderr)
+
+        print(f"Scanned {scanned} files, {failed} failed.", file=sys.stderr)
+
+    if args.files is not None:
+        for file, usages in index.pending(args.files or None).items():
+            for usage in usages:
+                print(f"{file}:{usage.line}:{usage.column}: {usage.command}: {usage.code}")
+    elif args.json:
+        print(json.dumps(asdict(index.report())))
+    else:
+        index.report().print()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from codemods.runner import FileResult
+
+# Journal of the files codemodded by a run, so a run which was killed can resume where it
+# stopped, and live progress of the run
+
+# Seconds between two syncs of the journal to the disk
+SYNC_SECONDS = 1.0
+
+# Seconds between two refreshes of the progress
+REFRESH_SECONDS = 0.5
+
+
+@dataclass(frozen=True)
+class Entry:
+    # Absolute path of the file
+    file: str
+    # Size and modification time in nanoseconds of the file once codemodded
+    size: int
+    mtime: int
+    # changed, unchanged, skipped or failed
+    outcome: str
+    seconds: float
+
+
+def outcome(result: "FileResult") -> str:
+    if result.error is not None:
+        return "failed"
+
+    if result.skip_reason is not None:
+        return "skipped"
+
+    return "changed" if result.changed else "unchanged"
+
+
+class Journal:
+    # Append-only journal with a JSON line per codemodded file after a first one naming the
+    # command, flushed after each file and synced to the disk at least every SYNC_SECONDS.
+    # A line cut short by a crash is ignored
+    def __init__(self, path: str, command: str):
+        self.path = path
+        self.command = command
+        self.entries: Dict[str, Entry] = {}
+        # Whether the last line was cut short
+        self.cut = False
+        # Files skipped by pending() as codemodded by a previous run
+        self.resumed = 0
+        self.load()
+
+        self.file = open(path, "ab")
+        self.synced = time.monotonic()
+
+        if self.file.tell() == 0:
+            self.write({"command": command})
+            self.sync()
+        elif self.cut:
+            self.file.write(b"\n")
+
+    def load(self) -> None:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            header = f.readline()
+
+            if not header:
+                return
+
+            self.cut = not header.endswith(b"\n")
+
+            try:
+                command = json.loads(header)["command"]
+            except (ValueError, TypeError, KeyError):
+                raise ValueError(f"{self.path} isn't a journal of codemods") from None
+
+            if command != self.command:
+                raise ValueError(f"{self.path} is the journal of another command, {command}")
+
+            for line in f:
+                self.cut = not line.endswith(b"\n")
+
+                try:
+                    entry = Entry(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+
+                self.entries[entry.file] = entry
+
+    def done(self, path: str) -> bool:
+        # Whether the file was codemodded by a previous run and wasn't modified since, the
+        # files which failed are codemodded again
+        entry = self.entries.get(os.path.abspath(path))
+
+        if entry is None or entry.outcome == "failed":
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        return (stat.st_size, stat.st_mtime_ns) == (entry.size, entry.mtime)
+
+    def pending(self, files: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        # Yields the files and their size which are left to codemod
+        for path, size in files:
+            if self.done(path):
+                self.resumed += 1
+            else:
+                yield path, size
+
+    def record(self, result: "FileResult") -> None:
+        try:
+            stat = os.stat(result.path)
+            size, mtime = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size = mtime = -1
+
+        entry = Entry(os.path.abspath(result.path), size, mtime, outcome(result), result.seconds)
+        self.write(asdict(entry))
+
+        if time.monotonic() - self.synced >= SYNC_SECONDS:
+            self.sync()
+
+    def write(self, data: Dict[str, object]) -> None:
+        self.file.write(json.dumps(data).encode() + b"\n")
+        self.file.flush()
+
+    def sync(self) -> None:
+        os.fsync(self.file.fileno())
+        self.synced = time.monotonic()
+
+    def close(self) -> None:
+        self.sync()
+        self.file.close()
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "kB", "MB"]:
+        if size < 1000:
+            return f"{size:.1f} {unit}"
+
+        size /= 1000
+
+    return f"{size:.1f} GB"
+
+
+class Progress:
+    # Prints on a line of the standard error the files codemodded, the files and bytes
+    # codemodded per second and the time left, estimated from the bytes left
+    def __init__(self, files: int, size: int, stream: TextIO = sys.stderr):
+        self.total_files = files
+        self.total_size = size
+        self.stream = stream
+        self.files = 0
+        self.size = 0
+        self.started = time.monotonic()
+        self.printed: Optional[float] = None
+        self.width = 0
+
+    def add(self, size: int) -> None:
+        self.files += 1
+        self.size += size
+        now = time.monotonic()
+
+        if (
+            self.printed is None
+            or now - self.printed >= REFRESH_SECONDS
+            or self.files == self.total_files
+        ):
+            self.print(now)
+
+    def status(self, now: float) -> str:
+        elapsed = max(now - self.started, 1e-6)
+        files_rate = self.files / elapsed
+        size_rate = self.size / elapsed
+
+        if self.size:
+            left = timedelta(seconds=round((self.total_size - self.size) / size_rate))
+        elif self.files:
+            left = timedelta(seconds=round((self.total_files - self.files) / files_rate))
+        else:
+            left = None
+
+        return (
+            f"{self.files}/{self.total_files} files, {files_rate:.1f} files/s, "
+            f"{format_size(size_rate)}/s, ETA {left if left is not None else '?'}"
+        )
+
+    def print(self, now: float) -> None:
+        status = self.status(now)
+        self.stream.write(f"\r{status:<{self.width}}")
+        self.stream.flush()
+        self.width = len(status)
+        self.printed = now
+
+    def clear(self) -> None:
+        # Erases the line before other messages, it's printed again on the next file
+        if self.width:
+            self.stream.write(f"\r{'':<{self.width}}\r")
+            self.width = 0
+            self.printed = None
+
+    def close(self) -> None:
+        if self.width:
+            self.stream.write("\n")
@@ -0,0 +1,79 @@
+import functools
+import os
+import stat
+import subprocess
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, Sequence, Tuple
+
+# Threads reading and writing the files of a chunk while its files are transformed
+IO_THREADS = 4
+
+
+def iter_files(paths: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    # Yields the Python files, with their size, found in the given files or directories
+    for path in paths:
+        if os.path.isfile(path):
+            yield path, os.path.getsize(path)
+        elif os.path.isdir(path):
+            directories = [path]
+
+            while directories:
+                with os.scandir(directories.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            directories.append(entry.path)
+                        elif entry.name.endswith(".py") and entry.is_file():
+                            yield entry.path, entry.stat().st_size
+
+
+def read_paths(stream: BinaryIO, separator: bytes = b"\n") -> Iterator[str]:
+    # Yields the paths read from the stream without reading it all in memory
+    buffer = b""
+
+    for data in iter(functools.partial(stream.read, 64 * 1024), b""):
+        *paths, buffer = (buffer + data).split(separator)
+
+        yield from (os.fsdecode(path) for path in paths if path)
+
+    if buffer:
+        yield os.fsdecode(buffer)
+
+
+def changed_paths(ref: str, paths: Sequence[str] = ()) -> Iterator[str]:
+    # Yields the Python files added, copied, modified or renamed since the git ref, either
+    # in the working tree or only in the index, restricted to the given paths if any
+    root = os.fsdecode(
+        subprocess.check_output(["git", "rev-parse", "--show-toplevel"]).rstrip(b"\n")
+    )
+    seen = set()
+
+    for staged in ([], ["--cached"]):
+        output = subprocess.check_output(
+            ["git", "diff", "--name-only", "-z", "--diff-filter=ACMR", *staged, ref, "--", *paths]
+        )
+
+        for name in output.split(b"\0"):
+            path = os.path.relpath(os.path.join(root, os.fsdecode(name)))
+
+            if name and name.endswith(b".py") and path not in seen:
+                seen.add(path)
+                yield path
+
+
+def write_file(path: str, data: bytes) -> None:
+    # Replaces the file's content atomically, through a temporary file in the same directory
+    # renamed over the file, keeping its permissions and the symbolic links to it
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    mode = stat.S_IMODE(os.stat(path).st_mode)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
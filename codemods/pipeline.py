@@ -0,0 +1,125 @@
+import functools
+from abc import ABC
+from dataclasses import replace
+from typing import (
+    Callable,
+    ClassVar,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+from libcst.codemod.visitors import AddImportsVisitor, RemoveImportsVisitor
+from libcst.metadata import MetadataWrapper
+
+from codemods.fused import FusedCodemodCommand
+
+
+class PipelineCodemodCommand(VisitorBasedCodemodCommand, ABC):
+    # Runs the commands one after another on the tree returned by the previous one, the
+    # source being parsed and the code generated once. Commands share the metadata wrapper,
+    # and its resolved metadata, until one of them changes the tree, a command leaving
+    # the tree unchanged being one whose leave_* hooks always return the updated node
+    COMMANDS: ClassVar[Sequence[Type[VisitorBasedCodemodCommand]]] = ()
+
+    def __init__(self, context: CodemodContext):
+        super().__init__(context)
+
+        # Called with each command before it runs, i.e. to count its visited nodes
+        self.instruments: List[Callable[[VisitorBasedCodemodCommand], None]] = []
+
+    def transform_module(self, tree: cst.Module) -> cst.Module:
+        # Each command resolves its own metadata in transform_module_impl()
+        return self.transform_module_impl(tree)
+
+    def transform_module_impl(self, tree: cst.Module) -> cst.Module:
+        wrapper: Optional[MetadataWrapper] = None
+
+        for klass in self.COMMANDS:
+            if wrapper is None:
+                wrapper = MetadataWrapper(tree)
+
+            command = klass(replace(self.context, wrapper=wrapper, scratch={}))
+            changed = track_changes(command)
+
+            for instrument in self.instruments:
+                instrument(command)
+
+            with command.resolve(wrapper):
+                updated_tree = command.transform_module_impl(wrapper.module)
+
+            updated_tree, fixed_imports = fix_imports(command, updated_tree)
+
+            if changed[0] or fixed_imports:
+                tree, wrapper = updated_tree, None
+            else:
+                tree = wrapper.module
+
+        return tree
+
+
+def track_changes(command: VisitorBasedCodemodCommand) -> List[bool]:
+    # Returns a list with a flag set when any of the command's on_leave() calls doesn't
+    # return the updated node
+    changed = [False]
+    on_leave = command.on_leave
+
+    def tracking_on_leave(
+        original_node: cst.CSTNode, updated_node: cst.CSTNode
+    ) -> Union[cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel[cst.CSTNode]]:
+        retval = on_leave(original_node, updated_node)
+
+        if retval is not updated_node:
+            changed[0] = True
+
+        return retval
+
+    setattr(command, "on_leave", tracking_on_leave)
+
+    return changed
+
+
+def fix_imports(command: VisitorBasedCodemodCommand, tree: cst.Module) -> Tuple[cst.Module, bool]:
+    # Runs the imports' fixes scheduled by the command, or by each command of a fused one,
+    # returns the tree and if any fix was run
+    commands = command.commands if isinstance(command, FusedCodemodCommand) else [command]
+    fixed = False
+
+    for subcommand in commands:
+        if AddImportsVisitor.CONTEXT_KEY in subcommand.context.scratch:
+            tree = AddImportsVisitor(subcommand.context).transform_module(tree)
+            fixed = True
+        if RemoveImportsVisitor.CONTEXT_KEY in subcommand.context.scratch:
+            tree = RemoveImportsVisitor(subcommand.context).transform_module(tree)
+            fixed = True
+
+    return tree, fixed
+
+
+@functools.lru_cache(maxsize=None)
+def pipeline(
+    commands: Tuple[Type[VisitorBasedCodemodCommand], ...]
+) -> Type[PipelineCodemodCommand]:
+    # Creates the pipeline command running the given commands, the class is registered into
+    # this module so the cache and the workers can refer to it by name
+    name = "Pipeline[{}]".format(
+        ",".join(f"{command.__module__}.{command.__qualname__}" for command in commands)
+    )
+    command = type(
+        name,
+        (PipelineCodemodCommand,),
+        {
+            "DESCRIPTION": f"Runs {', '.join(c.__name__ for c in commands)} one after another",
+            "COMMANDS": list(commands),
+            "__module__": __name__,
+            "__qualname__": name,
+        },
+    )
+    globals()[name] = command
+
+    return command
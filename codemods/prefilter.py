@@ -0,0 +1,153 @@
+import dataclasses
+import functools
+import importlib
+import re
+from typing import FrozenSet, Iterable, Iterator, Optional, Pattern, Set, Type
+
+import libcst as cst
+from libcst import matchers
+from libcst.codemod import VisitorBasedCodemodCommand
+
+from codemods.fused import FusedCodemodCommand
+from codemods.pipeline import PipelineCodemodCommand, pipeline
+
+# Keywords which must be present in the source for a node to exist, used when the
+# matcher doesn't match any name
+NODES_KEYWORDS = {"ClassDef": "class", "FunctionDef": "def"}
+
+
+def load_command(name: str) -> Type[VisitorBasedCodemodCommand]:
+    # Loads a command by its name relative to the codemods package, i.e. wxpython.SizerAddCommand,
+    # comma separated names load a pipeline of the commands
+    if "," in name:
+        return pipeline(tuple(load_command(part) for part in name.split(",")))
+
+    module_name, _, class_name = name.rpartition(".")
+    module = importlib.import_module(f"codemods.{module_name}")
+    command: Type[VisitorBasedCodemodCommand] = getattr(module, class_name)
+
+    return command
+
+
+def command_name(command: Type[VisitorBasedCodemodCommand]) -> str:
+    # Name of the command relative to the codemods package, the inverse of load_command()
+    module_name = command.__module__
+
+    if module_name.startswith("codemods."):
+        module_name = module_name.split(".", 1)[1]
+
+    return f"{module_name}.{command.__name__}"
+
+
+def required_names(matcher: object) -> Set[str]:
+    # Returns the names which must be present in a node for the matcher to match it
+    if isinstance(matcher, matchers.AllOf):
+        return set().union(*(required_names(option) for option in matcher.options))
+
+    if not isinstance(matcher, matchers.BaseMatcherNode) or not dataclasses.is_dataclass(matcher):
+        return set()
+
+    names = set()
+
+    if isinstance(matcher, matchers.Name) and isinstance(matcher.value, str):
+        names.add(matcher.value)
+
+    for field in dataclasses.fields(matcher):
+        value = getattr(matcher, field.name)
+        values = value if isinstance(value, (list, tuple)) else [value]
+
+        for item in values:
+            names.update(required_names(item))
+
+    return names
+
+
+def iter_matchers(value: object) -> Iterator[matchers.BaseMatcherNode]:
+    if isinstance(value, matchers.BaseMatcherNode):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.items():
+            yield from iter_matchers(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            yield from iter_matchers(item)
+
+
+def hooked_nodes(command: Type[VisitorBasedCodemodCommand]) -> Set[str]:
+    # Returns the name of the nodes the command has visit_* or leave_* hooks for
+    return {
+        name.split("_", 1)[1]
+        for name in dir(command)
+        if name.startswith(("visit_", "leave_"))
+        and getattr(command, name) is not getattr(cst.CSTTransformer, name, None)
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def trigger_tokens(command: Type[VisitorBasedCodemodCommand]) -> Optional[FrozenSet[str]]:
+    # Returns the tokens of which at least one must be in a file for the command to change
+    # it, None if the tokens cannot be derived from the command's matchers or
+    # TRIGGER_TOKENS attribute
+    tokens: Set[str] = set()
+
+    if issubclass(command, (FusedCodemodCommand, PipelineCodemodCommand)):
+        for subcommand in command.COMMANDS:
+            subcommand_tokens = trigger_tokens(subcommand)
+
+            if subcommand_tokens is None:
+                return None
+
+            tokens.update(subcommand_tokens)
+    else:
+        # Commands not driven by matchers can declare their tokens
+        tokens.update(getattr(command, "TRIGGER_TOKENS", None) or ())
+        nodes = hooked_nodes(command)
+
+        for klass in command.__mro__:
+            if klass.__module__.startswith("libcst"):
+                continue
+
+            for matcher in iter_matchers(list(vars(klass).values())):
+                if type(matcher).__name__ not in nodes:
+                    continue
+
+                names = required_names(matcher)
+
+                if names:
+                    # The longest name is usually the most selective one
+                    tokens.add(max(sorted(names), key=len))
+                elif type(matcher).__name__ in NODES_KEYWORDS:
+                    tokens.add(NODES_KEYWORDS[type(matcher).__name__])
+                else:
+                    return None
+
+    if not tokens:
+        return None
+
+    # Tokens containing another token are redundant
+    return frozenset(
+        token for token in tokens if not any(t != token and t in token for t in tokens)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def trigger_pattern(command: Type[VisitorBasedCodemodCommand]) -> Optional[Pattern[bytes]]:
+    tokens = trigger_tokens(command)
+
+    if tokens is None:
+        return None
+
+    return re.compile(b"|".join(re.escape(token.encode()) for token in sorted(tokens)))
+
+
+def may_match(command: Type[VisitorBasedCodemodCommand], source: bytes) -> bool:
+    pattern = trigger_pattern(command)
+
+    return pattern is None or pattern.search(source) is not None
+
+
+def filter_paths(command: Type[VisitorBasedCodemodCommand], paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, "rb") as f:
+            if may_match(command, f.read()):
+                yield path
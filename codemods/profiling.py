@@ -0,0 +1,210 @@
+import contextlib
+import functools
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    TextIO,
+    Tuple,
+    Type,
+)
+
+import libcst as cst
+from libcst import matchers
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+
+from codemods.fused import FusedCodemodCommand
+from codemods.pipeline import PipelineCodemodCommand
+from codemods.prefilter import command_name, hooked_nodes
+
+
+@dataclass
+class Profile:
+    file: str
+    command: str
+    parse: float = 0.0
+    transform: float = 0.0
+    codegen: float = 0.0
+    format: float = 0.0
+    nodes: int = 0
+    changes: int = 0
+    matches_calls: int = 0
+    matches_time: float = 0.0
+    # Number of calls and time spent by each visit_* and leave_* hook
+    hooks: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        return self.parse + self.transform + self.codegen + self.format
+
+    def timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self.hooks.setdefault(name, [0, 0.0])
+        is_leave = name.rpartition(".")[2].startswith("leave_")
+
+        @functools.wraps(func)
+        def wrapper(*args: Any) -> Any:
+            start = time.perf_counter()
+
+            try:
+                retval = func(*args)
+            finally:
+                stats[0] += 1
+                stats[1] += time.perf_counter() - start
+
+            if is_leave and len(args) == 2 and retval is not args[1]:
+                self.changes += 1
+
+            return retval
+
+        return wrapper
+
+    def instrument(self, command: VisitorBasedCodemodCommand) -> None:
+        # Replaces the command's hooks with timed ones and counts the visited nodes, the
+        # commands of a pipeline being instrumented as they're created
+        if isinstance(command, PipelineCodemodCommand):
+            command.instruments.append(self.instrument)
+            return
+
+        commands = command.commands if isinstance(command, FusedCodemodCommand) else [command]
+
+        for instance in commands:
+            for node in hooked_nodes(type(instance)):
+                for prefix in ("visit_", "leave_"):
+                    name = f"{prefix}{node}"
+                    hook = getattr(instance, name, None)
+
+                    if hook is not None and getattr(type(instance), name) is not getattr(
+                        cst.CSTTransformer, name, None
+                    ):
+                        key = f"{command_name(type(instance))}.{name}"
+                        setattr(instance, name, self.timed(key, hook))
+
+        on_visit = command.on_visit
+
+        def counting_on_visit(node: cst.CSTNode) -> bool:
+            self.nodes += 1
+
+            return on_visit(node)
+
+        setattr(command, "on_visit", counting_on_visit)
+
+    @contextlib.contextmanager
+    def matches(self) -> Iterator[None]:
+        # Times all the calls to matchers.matches() made while in the context
+        original_matches = matchers.matches
+
+        @functools.wraps(original_matches)
+        def timed_matches(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+
+            try:
+                return original_matches(*args, **kwargs)
+            finally:
+                self.matches_calls += 1
+                self.matches_time += time.perf_counter() - start
+
+        setattr(matchers, "matches", timed_matches)
+
+        try:
+            yield
+        finally:
+            setattr(matchers, "matches", original_matches)
+
+
+def profile_source(
+    command: Type[VisitorBasedCodemodCommand],
+    source: bytes,
+    context: CodemodContext,
+    formatter: Sequence[str] = (),
+    instruments: Sequence[Callable[[VisitorBasedCodemodCommand], None]] = (),
+) -> Tuple[bytes, Profile]:
+    # Same as transform_source() from the runner, timing each step of the transformation.
+    # The instruments, i.e. the file's budget, are applied to the command after the profile
+    profile = Profile(file=context.filename or "", command=command_name(command))
+
+    start = time.perf_counter()
+    module = cst.parse_module(source)
+    profile.parse = time.perf_counter() - start
+
+    instance = command(context)
+    profile.instrument(instance)
+
+    for instrument in instruments:
+        instrument(instance)
+
+    start = time.perf_counter()
+
+    with profile.matches():
+        module = instance.transform_module(module)
+
+    profile.transform = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output = module.bytes
+    profile.codegen = time.perf_counter() - start
+
+    if formatter and output != source:
+        start = time.perf_counter()
+        output = subprocess.check_output(formatter, input=output)
+        profile.format = time.perf_counter() - start
+
+    return output, profile
+
+
+@dataclass
+class ProfileSummary:
+    files: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+    hooks: Dict[str, List[float]] = field(default_factory=dict)
+    slowest: List[Tuple[float, str]] = field(default_factory=list)
+    nodes: int = 0
+    changes: int = 0
+    matches_calls: int = 0
+    matches_time: float = 0.0
+
+    def add(self, profile: Profile, slowest: int = 10) -> None:
+        self.files += 1
+        self.nodes += profile.nodes
+        self.changes += profile.changes
+        self.matches_calls += profile.matches_calls
+        self.matches_time += profile.matches_time
+
+        for phase in ("parse", "transform", "codegen", "format"):
+            self.phases[phase] = self.phases.get(phase, 0.0) + getattr(profile, phase)
+
+        for name, (calls, seconds) in profile.hooks.items():
+            stats = self.hooks.setdefault(name, [0, 0.0])
+            stats[0] += calls
+            stats[1] += seconds
+
+        self.slowest = sorted([*self.slowest, (profile.total, profile.file)], reverse=True)
+        del self.slowest[slowest:]
+
+    def print(self, stream: TextIO = sys.stderr) -> None:
+        print(
+            f"Profiled {self.files} files, {self.nodes} nodes, {self.changes} changes", file=stream
+        )
+        print(f"{'Phase':<60} {'calls':>10} {'seconds':>10}", file=stream)
+
+        for phase, seconds in self.phases.items():
+            print(f"{phase:<60} {self.files:>10} {seconds:>10.3f}", file=stream)
+
+        print(
+            f"{'matchers.matches':<60} {self.matches_calls:>10} {self.matches_time:>10.3f}",
+            file=stream,
+        )
+
+        for name, (calls, seconds) in sorted(self.hooks.items(), key=lambda item: -item[1][1]):
+            print(f"{name:<60} {int(calls):>10} {seconds:>10.3f}", file=stream)
+
+        print("Slowest files:", file=stream)
+
+        for seconds, path in self.slowest:
+            print(f"{seconds:>10.3f} {path}", file=stream)
@@ -0,0 +1,246 @@
+import bisect
+import difflib
+import os
+import re
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import libcst as cst
+from libcst.codemod import VisitorBasedCodemodCommand
+from libcst.metadata import CodeRange, MetadataWrapper, PositionProvider
+
+from codemods.pipeline import PipelineCodemodCommand
+
+# Inclusive range of line numbers, starting from 1
+Range = Tuple[int, int]
+
+HUNK_HEADER = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def merge_ranges(ranges: Iterable[Range]) -> List[Range]:
+    # Sorts the ranges, merging the overlapping and adjacent ones
+    merged: List[Range] = []
+
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def parse_ranges(spec: str) -> List[Range]:
+    # Parses comma separated lines or ranges of lines, i.e. 10-20,35
+    ranges = []
+
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+
+        if not start.isdigit() or not (end or start).isdigit():
+            raise ValueError(f"Invalid range of lines: {part}")
+
+        ranges.append((int(start), int(end or start)))
+
+    return merge_ranges(ranges)
+
+
+def parse_file_ranges(spec: str) -> Tuple[str, List[Range]]:
+    # Parses a file's ranges of lines, i.e. src/frame.py:10-20,35
+    path, separator, ranges = spec.rpartition(":")
+
+    if not separator or not path:
+        raise ValueError(f"Invalid file's ranges of lines: {spec}")
+
+    return path, parse_ranges(ranges)
+
+
+def diff_ranges(diff: bytes, strip: int = 1) -> Dict[str, List[Range]]:
+    # Returns the lines added or modified in each file of the unified diff, named as in the
+    # diff stripped of its first strip components like patch -p. Lines removed by a hunk
+    # are counted as a change of the line following them
+    ranges: Dict[str, List[Range]] = {}
+    lines: Optional[List[Range]] = None
+    line = 0
+    # Lines of the hunk left to read on the old and new sides
+    old_left = new_left = 0
+
+    for diff_line in diff.splitlines():
+        if diff_line.startswith(b"\\"):
+            # "\ No newline at end of file", not a line of either side
+            continue
+
+        if old_left > 0 or new_left > 0:
+            if diff_line.startswith(b"+"):
+                new_left -= 1
+                changed = True
+            elif diff_line.startswith(b"-"):
+                old_left -= 1
+                changed = True
+            else:
+                old_left -= 1
+                new_left -= 1
+                changed = False
+
+            if changed and lines is not None:
+                lines.append((line, line))
+
+            # Removed lines don't move to the next line of the new side
+            line += not diff_line.startswith(b"-")
+        elif diff_line.startswith(b"+++ "):
+            name = diff_line[4:].split(b"\t")[0]
+            lines = None
+
+            if name != b"/dev/null":
+                path = os.fsdecode(b"/".join(name.split(b"/")[strip:]))
+                lines = ranges.setdefault(path, [])
+        elif diff_line.startswith(b"@@"):
+            match = HUNK_HEADER.match(diff_line)
+
+            if match is None:
+                raise ValueError(f"Invalid hunk header: {os.fsdecode(diff_line)}")
+
+            old_left = int(match.group(2) or 1)
+            new_left = int(match.group(4) or 1)
+            # Hunks only removing lines start at the line before the removed ones
+            line = int(match.group(3)) + (new_left == 0)
+
+    return {path: merge_ranges(lines) for path, lines in ranges.items() if lines}
+
+
+def map_ranges(ranges: "LineRanges", old: Sequence[str], new: Sequence[str]) -> List[Range]:
+    # Maps the ranges of the old lines onto the new lines: unchanged lines keep being in the
+    # ranges, replaced lines are when the ones they replace overlap the ranges and inserted
+    # lines when the lines on both sides of them are in the ranges
+    mapped: List[Range] = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            # Lines are numbered from 1, the opcodes' indexes from 0
+            for start, end in ranges.ranges:
+                start, end = max(start, old_start + 1), min(end, old_end)
+
+                if start <= end:
+                    mapped.append((start - old_start + new_start, end - old_start + new_start))
+        elif new_start < new_end and (
+            ranges.overlaps(old_start + 1, old_end)
+            if tag == "replace"
+            else old_start in ranges and old_start + 1 in ranges
+        ):
+            mapped.append((new_start + 1, new_end))
+
+    return merge_ranges(mapped)
+
+
+class LineRanges:
+    def __init__(self, ranges: Sequence[Range]):
+        self.ranges = merge_ranges(ranges)
+        self.starts = [start for start, _ in self.ranges]
+
+    def __contains__(self, line: int) -> bool:
+        return self.overlaps(line, line)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect.bisect_right(self.starts, end) - 1
+
+        return i >= 0 and self.ranges[i][1] >= start
+
+    def limit(self, command: VisitorBasedCodemodCommand) -> None:
+        # Restricts the command to the nodes overlapping the ranges, the others are left
+        # unchanged and their children aren't visited. The changes of the compound
+        # statements, i.e. functions, are only kept when their header, not their body,
+        # overlaps the ranges
+        if isinstance(command, PipelineCodemodCommand):
+            command.instruments.append(self.step_limit())
+            return
+
+        on_visit = command.on_visit
+        on_leave = command.on_leave
+        # Positions of the nodes of the tree being transformed, resolved on first use
+        resolved: List[Tuple[MetadataWrapper, Mapping[cst.CSTNode, CodeRange]]] = []
+
+        def position(node: cst.CSTNode) -> Optional[CodeRange]:
+            wrapper = command.context.wrapper
+
+            if wrapper is None:
+                raise ValueError("Line ranges need the positions of the nodes")
+
+            if not resolved or resolved[-1][0] is not wrapper:
+                resolved[:] = [(wrapper, wrapper.resolve(PositionProvider))]
+
+            return resolved[-1][1].get(node)
+
+        def overlaps(node: cst.CSTNode) -> bool:
+            node_position = position(node)
+
+            return node_position is None or self.overlaps(
+                node_position.start.line, node_position.end.line
+            )
+
+        def header_overlaps(node: cst.CSTNode) -> bool:
+            node_position = position(node)
+            body = getattr(node, "body", None)
+            body_position = position(body) if isinstance(body, cst.BaseSuite) else None
+
+            if node_position is None or body_position is None:
+                return overlaps(node)
+
+            # Indented blocks start on the line of their first statement
+            end = body_position.start.line - isinstance(body, cst.IndentedBlock)
+
+            return self.overlaps(node_position.start.line, max(node_position.start.line, end))
+
+        def limited_on_visit(node: cst.CSTNode) -> bool:
+            return overlaps(node) and on_visit(node)
+
+        def limited_on_leave(
+            original_node: cst.CSTNode, updated_node: cst.CSTNode
+        ) -> Union[cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel[cst.CSTNode]]:
+            if not overlaps(original_node):
+                return updated_node
+
+            # Called for the commands to keep their state in step with the visited nodes
+            result = on_leave(original_node, updated_node)
+
+            return result if header_overlaps(original_node) else updated_node
+
+        setattr(command, "on_visit", limited_on_visit)
+        setattr(command, "on_leave", limited_on_leave)
+
+    def step_limit(self) -> Callable[[VisitorBasedCodemodCommand], None]:
+        # Limits each command of a pipeline, the ranges being mapped onto the lines of the
+        # tree it transforms when the previous commands added or removed lines
+        original: List[List[str]] = []
+        # Ranges of the last tree transformed, kept while the commands leave it unchanged
+        mapped: List[Tuple[MetadataWrapper, LineRanges]] = []
+
+        def limit(command: VisitorBasedCodemodCommand) -> None:
+            wrapper = command.context.wrapper
+
+            if wrapper is None:
+                raise ValueError("Line ranges need the positions of the nodes")
+
+            if not mapped or mapped[-1][0] is not wrapper:
+                lines = wrapper.module.code.splitlines(keepends=True)
+
+                if not original:
+                    original.append(lines)
+                    ranges = self
+                else:
+                    ranges = LineRanges(map_ranges(self, original[0], lines))
+
+                mapped[:] = [(wrapper, ranges)]
+
+            mapped[-1][1].limit(command)
+
+        return limit
@@ -0,0 +1,187 @@
+import argparse
+import functools
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+)
+
+from codemods.paths import iter_files
+
+# Registry of the commands, importing neither LibCST nor the commands' modules, to list,
+# validate and pre-filter the commands without paying the cost of importing them. Kept in
+# sync with the commands by the registry's tests
+
+
+@dataclass(frozen=True)
+class CommandInfo:
+    description: str
+    # Tokens of which at least one must be in a file for the command to change it, None if
+    # any file can be changed
+    tokens: Optional[FrozenSet[str]] = None
+    # Names of the commands run by a fused command
+    commands: Sequence[str] = ()
+
+
+COMMANDS: Dict[str, CommandInfo] = {
+    "mypy.DefaultFunctionReturnTypeCommand": CommandInfo(
+        "Adds a default return type of None for functions without a return type",
+        frozenset(["def"]),
+    ),
+    "wxpython.ColorToColourCommand": CommandInfo(
+        "Converts usage of wx.Color into wx.Colour", frozenset(["Color"])
+    ),
+    "wxpython.ConstantsRenameCommand": CommandInfo(
+        "Rename constants",
+        frozenset(
+            [
+                "WXK_PRIOR",
+                "WXK_NEXT",
+                "WXK_NUMPAD_PRIOR",
+                "WXK_NUMPAD_NEXT",
+                "OPEN",
+                "FILE_MUST_EXIST",
+                "TE_LINEWRAP",
+            ]
+        ),
+    ),
+    "wxpython.FixImportFromAdvCommand": CommandInfo(
+        "Fix importing symbols now moved into wx.adv package",
+        frozenset(["DatePickerCtrl", "DP_ALLOWNONE", "DP_DROPDOWN", "DP_SHOWCENTURY"]),
+    ),
+    "wxpython.FlexGridSizerCommand": CommandInfo(
+        "Updates wx.FlexGridSize constructor's calls", frozenset(["FlexGridSizer"])
+    ),
+    "wxpython.MenuAppendCommand": CommandInfo(
+        "Migrate to wx.MenuAppend() method and update keywords", frozenset(["Append"])
+    ),
+    "wxpython.ToolbarAddToolCommand": CommandInfo(
+        "Transforms wx.Toolbar.DoAddTool method into AddTool", frozenset(["DoAddTool"])
+    ),
+    "wxpython.SizerAddCommand": CommandInfo(
+        "Transforms wx.Sizer.AddWindow method into Add", frozenset(["AddWindow"])
+    ),
+    "wxpython.ListCtrlInsertColumnCommand": CommandInfo(
+        "Transforms wx.ListCtrl.InsertColumnInfo method into InsertColumn",
+        frozenset(["InsertColumnInfo"]),
+    ),
+    "wxpython.DeprecationWarningsCommand": CommandInfo(
+        "Rename deprecated methods",
+        frozenset(["BitmapFromImage", "ImageFromStream", "EmptyIcon", "DateTimeFromDMY"]),
+    ),
+    "wxpython.MakeModalCommand": CommandInfo(
+        "Replace built-in method MAkeModal with helper", frozenset(["MakeModal"])
+    ),
+    "wxpython.WxPythonMigrationCommand": CommandInfo(
+        "Runs all the wxPython 2.8 to 4.x migrations in a single pass",
+        commands=(
+            "wxpython.ColorToColourCommand",
+            "wxpython.ConstantsRenameCommand",
+            "wxpython.FixImportFromAdvCommand",
+            "wxpython.FlexGridSizerCommand",
+            "wxpython.MenuAppendCommand",
+            "wxpython.ToolbarAddToolCommand",
+            "wxpython.SizerAddCommand",
+            "wxpython.ListCtrlInsertColumnCommand",
+            "wxpython.DeprecationWarningsCommand",
+            "wxpython.MakeModalCommand",
+        ),
+    ),
+}
+
+
+def is_registered(name: str) -> bool:
+    # Comma separated names are pipelines of commands
+    return all(part in COMMANDS for part in name.split(","))
+
+
+@functools.lru_cache(maxsize=None)
+def trigger_tokens(name: str) -> Optional[FrozenSet[str]]:
+    # Same as codemods.prefilter.trigger_tokens() for a registered command or pipeline
+    parts = name.split(",")
+    info = COMMANDS[name] if len(parts) == 1 else CommandInfo("", commands=parts)
+
+    if not info.commands:
+        return info.tokens
+
+    tokens: Set[str] = set()
+
+    for command in info.commands:
+        command_tokens = trigger_tokens(command)
+
+        if command_tokens is None:
+            return None
+
+        tokens.update(command_tokens)
+
+    return frozenset(
+        token for token in tokens if not any(t != token and t in token for t in tokens)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def trigger_pattern(name: str) -> Optional[Pattern[bytes]]:
+    tokens = trigger_tokens(name)
+
+    if tokens is None:
+        return None
+
+    return re.compile(b"|".join(re.escape(token.encode()) for token in sorted(tokens)))
+
+
+def may_match(name: str, source: bytes) -> bool:
+    pattern = trigger_pattern(name)
+
+    return pattern is None or pattern.search(source) is not None
+
+
+def filter_paths(name: str, paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, "rb") as f:
+            if may_match(name, f.read()):
+                yield path
+
+
+def print_commands() -> None:
+    width = max(len(name) for name in COMMANDS)
+
+    for name, info in sorted(COMMANDS.items()):
+        print(f"{name:<{width}}  {info.description}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Lists the commands, or prints NUL separated the files which may be "
+        "changed by the command"
+    )
+    parser.add_argument("command", nargs="?", help="Command, i.e. wxpython.SizerAddCommand")
+    parser.add_argument("paths", nargs="*", help="Files or directories to filter")
+
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        print_commands()
+        return 0
+
+    if not is_registered(args.command):
+        parser.error(f"unknown command {args.command}")
+
+    paths = (path for path, _ in iter_files(args.paths))
+
+    for path in filter_paths(args.command, paths):
+        sys.stdout.buffer.write(os.fsencode(path) + b"\0")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
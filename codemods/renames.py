@@ -0,0 +1,266 @@
+import json
+from abc import ABC
+from dataclasses import dataclass
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+)
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+from libcst.codemod.visitors import AddImportsVisitor, RemoveImportsVisitor
+from libcst.helpers import get_absolute_module_from_package_for_import
+
+# Kinds of renames of a spec: "symbols" renames dotted names wherever they're used,
+# "calls" only when they're called, also when imported without their module's prefix,
+# "methods" renames the method of any object, "keywords" renames the keyword arguments of
+# the calls to a method of any object, "imports" are added when a symbol or a call is renamed
+SPEC_KEYS = ("symbols", "calls", "methods", "keywords", "imports")
+
+
+def dotted_node(name: str) -> cst.BaseExpression:
+    # Builds the expression of a dotted name, i.e. wx.DateTime.FromDMY
+    node: cst.BaseExpression = cst.Name(value=name.split(".")[0])
+
+    for part in name.split(".")[1:]:
+        node = cst.Attribute(value=node, attr=cst.Name(value=part))
+
+    return node
+
+
+def dotted_name(node: cst.BaseExpression) -> Optional[str]:
+    # Dotted name of a chain of names and attributes, None for any other expression in the
+    # chain, i.e. wx().OPEN, unlike get_full_name_for_node which skips calls and subscripts
+    parts = []
+
+    while isinstance(node, cst.Attribute):
+        parts.append(node.attr.value)
+        node = node.value
+
+    if not isinstance(node, cst.Name):
+        return None
+
+    parts.append(node.value)
+
+    return ".".join(reversed(parts))
+
+
+def by_last_part(renames: Mapping[str, str]) -> Dict[str, Dict[str, cst.BaseExpression]]:
+    # Groups the renamed dotted names by their last part, a node is then looked up by its
+    # attribute's name before computing its full name
+    index: Dict[str, Dict[str, cst.BaseExpression]] = {}
+
+    for name, renamed in renames.items():
+        index.setdefault(name.rpartition(".")[2], {})[name] = dotted_node(renamed)
+
+    return index
+
+
+def rename_keywords(call: cst.Call, renames: Mapping[str, cst.Name]) -> cst.Call:
+    # Renames the keyword arguments of the call in a single pass over its arguments, the
+    # call is returned as is if no argument is renamed
+    args: Optional[List[cst.Arg]] = None
+
+    for i, arg in enumerate(call.args):
+        renamed = renames.get(arg.keyword.value) if arg.keyword is not None else None
+
+        if renamed is not None:
+            if args is None:
+                args = list(call.args)
+
+            args[i] = arg.with_changes(keyword=renamed)
+
+    return call if args is None else call.with_changes(args=args)
+
+
+@dataclass(frozen=True)
+class RenameTable:
+    symbols: Mapping[str, Mapping[str, cst.BaseExpression]]
+    calls: Mapping[str, Mapping[str, cst.BaseExpression]]
+    methods: Mapping[str, cst.Name]
+    keywords: Mapping[str, Mapping[str, cst.Name]]
+    imports: Sequence[str]
+    # Modules the called symbols can be imported from
+    modules: FrozenSet[str]
+    # Names of which at least one must be in a file for the table to change it
+    tokens: FrozenSet[str]
+
+    @classmethod
+    def compile(cls, spec: Mapping[str, Any]) -> "RenameTable":
+        unknown = set(spec) - set(SPEC_KEYS)
+
+        if unknown:
+            raise ValueError(f"Unknown renames: {', '.join(sorted(unknown))}")
+
+        symbols: Mapping[str, str] = spec.get("symbols", {})
+        calls: Mapping[str, str] = spec.get("calls", {})
+        methods: Mapping[str, str] = spec.get("methods", {})
+        keywords: Mapping[str, Mapping[str, str]] = spec.get("keywords", {})
+
+        return cls(
+            symbols=by_last_part(symbols),
+            calls=by_last_part(calls),
+            methods={name: cst.Name(value=renamed) for name, renamed in methods.items()},
+            keywords={
+                method: {name: cst.Name(value=renamed) for name, renamed in renames.items()}
+                for method, renames in keywords.items()
+            },
+            imports=list(spec.get("imports", [])),
+            modules=frozenset(name.rpartition(".")[0] for name in calls if "." in name),
+            tokens=frozenset(
+                [
+                    *(name.rpartition(".")[2] for name in [*symbols, *calls]),
+                    *methods,
+                    *keywords,
+                ]
+            ),
+        )
+
+
+def load_renames(path: str) -> Dict[str, RenameTable]:
+    # Loads a JSON file mapping the names of the tables to their spec
+    with open(path) as f:
+        specs: Dict[str, Mapping[str, Any]] = json.load(f)
+
+    return {name: RenameTable.compile(spec) for name, spec in specs.items()}
+
+
+class RenameCommand(VisitorBasedCodemodCommand, ABC):
+    # Applies the renames of a table, whatever the number of renames each node is looked
+    # up with a single dict access
+    RENAMES: ClassVar[RenameTable]
+    TRIGGER_TOKENS: ClassVar[Optional[FrozenSet[str]]] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        if "RENAMES" in vars(cls):
+            cls.TRIGGER_TOKENS = cls.RENAMES.tokens
+
+    def __init__(self, context: CodemodContext):
+        super().__init__(context)
+
+        # Symbols imported without their module's prefix, with the module they're
+        # imported from, and modules imported as a whole
+        self.imported_symbols: Dict[str, str] = {}
+        self.imported_modules: Set[str] = set()
+        self.star_imported_modules: Set[str] = set()
+
+    def visit_Module(self, node: cst.Module) -> None:
+        # Collect the imports at the module's top level upfront, imports nested into other
+        # statements are collected while visiting the module. The instance may be reused
+        # for other modules, so the imports of the previous one are forgotten
+        self.imported_symbols = {}
+        self.imported_modules = set()
+        self.star_imported_modules = set()
+
+        if not self.RENAMES.modules:
+            return
+
+        for statement in node.body:
+            if isinstance(statement, cst.SimpleStatementLine):
+                for small_statement in statement.body:
+                    if isinstance(small_statement, cst.Import):
+                        self.visit_Import(small_statement)
+                    elif isinstance(small_statement, cst.ImportFrom):
+                        self.visit_ImportFrom(small_statement)
+
+    def visit_Import(self, node: cst.Import) -> None:
+        for alias in node.names:
+            if alias.asname is None and alias.evaluated_name in self.RENAMES.modules:
+                self.imported_modules.add(alias.evaluated_name)
+
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
+        if not self.RENAMES.modules:
+            return
+
+        module = get_absolute_module_from_package_for_import(self.context.full_package_name, node)
+
+        if module not in self.RENAMES.modules or module in self.star_imported_modules:
+            return
+
+        # Symbols imported by a star import cannot be removed from the imports
+        if isinstance(node.names, cst.ImportStar):
+            self.star_imported_modules.add(module)
+            self.imported_symbols = {
+                name: symbol_module
+                for name, symbol_module in self.imported_symbols.items()
+                if symbol_module != module
+            }
+        else:
+            for alias in node.names:
+                if alias.asname is None:
+                    self.imported_symbols[alias.evaluated_name] = module
+
+    def add_imports(self) -> None:
+        for module in self.RENAMES.imports:
+            AddImportsVisitor.add_needed_import(self.context, module)
+
+    def leave_Attribute(
+        self, original_node: cst.Attribute, updated_node: cst.Attribute
+    ) -> cst.BaseExpression:
+        renames = self.RENAMES.symbols.get(updated_node.attr.value)
+
+        if renames is not None:
+            renamed = renames.get(dotted_name(updated_node) or "")
+
+            if renamed is not None:
+                self.add_imports()
+
+                if isinstance(renamed, cst.Attribute):
+                    return updated_node.with_changes(value=renamed.value, attr=renamed.attr)
+
+                return renamed
+
+        return updated_node
+
+    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
+        func = updated_node.func
+
+        # Calls of symbols imported without their module's prefix
+        if isinstance(func, cst.Name) and func.value in self.imported_symbols:
+            renames = self.RENAMES.calls.get(func.value)
+            module = self.imported_symbols[func.value]
+
+            if renames is not None and f"{module}.{func.value}" in renames:
+                RemoveImportsVisitor.remove_unused_import_by_node(self.context, original_node)
+
+                if module not in self.imported_modules:
+                    AddImportsVisitor.add_needed_import(self.context, module)
+
+                self.add_imports()
+
+                return updated_node.with_changes(func=renames[f"{module}.{func.value}"])
+
+        if isinstance(func, cst.Attribute):
+            # Calls of symbols with their module's prefix
+            renames = self.RENAMES.calls.get(func.attr.value)
+
+            if renames is not None:
+                renamed = renames.get(dotted_name(func) or "")
+
+                if renamed is not None:
+                    self.add_imports()
+
+                    if isinstance(renamed, cst.Attribute):
+                        renamed = func.with_changes(value=renamed.value, attr=renamed.attr)
+
+                    return updated_node.with_changes(func=renamed)
+
+            # Methods' calls
+            keywords = self.RENAMES.keywords.get(func.attr.value)
+            method = self.RENAMES.methods.get(func.attr.value)
+
+            if keywords is not None:
+                updated_node = rename_keywords(updated_node, keywords)
+            if method is not None:
+                updated_node = updated_node.with_changes(func=func.with_changes(attr=method))
+
+        return updated_node
@@ -0,0 +1,752 @@
+import difflib
+import importlib
+import os
+import resource
+import subprocess
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import libcst as cst
+from libcst.codemod import CodemodContext, SkipFile, VisitorBasedCodemodCommand
+from libcst.helpers import calculate_module_and_package
+
+from codemods.budget import Budget, BudgetExceeded, Overrun
+from codemods.cache import ResultCache
+from codemods.paths import IO_THREADS, write_file
+from codemods.prefilter import may_match, trigger_pattern
+from codemods.profiling import Profile, profile_source
+from codemods.ranges import LineRanges, Range
+from codemods.scan import Match, scan_module
+
+GENERATED_MARKER = b"@gen" + b"erated"
+FORMATTER = ["black", "-q", "-"]
+
+# Modules imported by the workers' parent process before forking
+PRELOAD_MODULES = ["codemods.mypy", "codemods.wxpython"]
+
+# Maximum number of files and bytes sent to a worker at once
+CHUNK_FILES = 16
+CHUNK_BYTES = 256 * 1024
+
+# Multiple of the time budget of a file, plus seconds of grace for the latency of its
+# interruption, after which the worker stuck on its transform is killed
+WATCHDOG_FACTOR = 2
+WATCHDOG_GRACE = 1.0
+
+# Seconds a worker waits for the lock of the patch before failing the file, the lock may be
+# held by a worker which died while writing its diff
+PATCH_LOCK_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class RunOptions:
+    formatter: Sequence[str] = field(default_factory=lambda: list(FORMATTER))
+    include_generated: bool = False
+    repo_root: str = "."
+    scan: bool = False
+    profile: bool = False
+    # Report the changes as unified diffs instead of writing them
+    diff: bool = False
+    # Threads reading the next files ahead of the transforms and writing the changed ones
+    # behind them, 0 to read and write each file in turn
+    io_threads: int = IO_THREADS
+    # Wall-clock seconds and visited nodes after which a file is skipped and left untouched
+    max_seconds: Optional[float] = None
+    max_nodes: Optional[int] = None
+    # Lines to which the command is restricted by absolute path of the files, the files
+    # without lines are left untouched. None to transform the whole files
+    line_ranges: Optional[Mapping[str, Sequence[Range]]] = None
+
+
+@dataclass(frozen=True)
+class WorkerLimits:
+    # Workers are replaced by new ones after processing max_files files or when their
+    # resident memory grows above max_rss bytes, files bigger than isolate_size bytes are
+    # processed alone by a worker replaced right after
+    max_files: Optional[int] = None
+    max_rss: Optional[int] = None
+    isolate_size: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class FileResult:
+    path: str
+    changed: bool = False
+    cached: bool = False
+    skip_reason: Optional[str] = None
+    error: Optional[str] = None
+    warnings: Sequence[str] = ()
+    matches: Sequence[Match] = ()
+    profile: Optional[Profile] = None
+    diff: Optional[bytes] = None
+    # Set when the file was skipped for exceeding its budget
+    overrun: Optional[Overrun] = None
+    # Time taken to process the file's source, excluding its read and write
+    seconds: float = 0.0
+
+
+def module_and_package(path: str, options: RunOptions) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        module_and_package = calculate_module_and_package(options.repo_root, path)
+    except ValueError:
+        return None, None
+
+    return module_and_package.name, module_and_package.package
+
+
+def make_context(path: str, options: RunOptions, warnings: List[str]) -> CodemodContext:
+    full_module_name, full_package_name = module_and_package(path, options)
+
+    return CodemodContext(
+        warnings=warnings,
+        filename=path,
+        full_module_name=full_module_name,
+        full_package_name=full_package_name,
+    )
+
+
+def transform_source(
+    command: Type[VisitorBasedCodemodCommand],
+    source: bytes,
+    path: str,
+    options: RunOptions,
+    warnings: List[str],
+    budget: Optional[Budget] = None,
+    ranges: Optional[Sequence[Range]] = None,
+) -> bytes:
+    budget = budget or Budget()
+
+    # Commands can transform the source without parsing it when they're certain of the
+    # result, returning None otherwise
+    transform_bytes = getattr(command, "transform_bytes", None)
+    output = transform_bytes(source) if transform_bytes is not None and ranges is None else None
+
+    if output is None:
+        budget.phase = "parsing"
+        module = cst.parse_module(source)
+
+        budget.phase = "transforming"
+        instance = command(make_context(path, options, warnings))
+        budget.limit(instance)
+
+        if ranges is not None:
+            LineRanges(ranges).limit(instance)
+        output = instance.transform_module(module).bytes
+
+    if options.formatter and output != source:
+        budget.phase = "formatting"
+        output = subprocess.check_output(options.formatter, input=output)
+
+    return output
+
+
+def unified_diff(path: str, source: bytes, output: bytes) -> bytes:
+    # Diff between the source and the output in the format of git diff, applicable with
+    # git apply or patch -p1
+    name = os.fsencode(os.path.relpath(path))
+    lines = []
+
+    for line in difflib.diff_bytes(
+        difflib.unified_diff,
+        source.splitlines(keepends=True),
+        output.splitlines(keepends=True),
+        b"a/" + name,
+        b"b/" + name,
+    ):
+        if not line.endswith(b"\n"):
+            line += b"\n\\ No newline at end of file\n"
+
+        lines.append(line)
+
+    return b"".join(lines)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def process_source(
+    command: Type[VisitorBasedCodemodCommand],
+    path: str,
+    source: bytes,
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+) -> Tuple[FileResult, Optional[bytes]]:
+    # Returns the file's result, with the time it took, and the code to write into it, None
+    # if the file must be left untouched
+    started = time.perf_counter()
+    result, output = codemod_source(command, path, source, options, cache)
+
+    return replace(result, seconds=time.perf_counter() - started), output
+
+
+def codemod_source(
+    command: Type[VisitorBasedCodemodCommand],
+    path: str,
+    source: bytes,
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+) -> Tuple[FileResult, Optional[bytes]]:
+    warnings: List[str] = []
+    budget = Budget(options.max_seconds, options.max_nodes)
+    ranges = None
+
+    if options.line_ranges is not None:
+        ranges = options.line_ranges.get(os.path.abspath(path))
+
+        if not ranges:
+            return FileResult(path), None
+
+        # Results of the whole file's transform
+        cache = None
+
+    try:
+        with budget.watchdog():
+            if not options.include_generated and GENERATED_MARKER in source:
+                return FileResult(path, skip_reason="Generated file."), None
+
+            # Don't parse files which cannot be changed by the command
+            if not may_match(command, source):
+                return FileResult(path), None
+
+            # Report what would be changed without transforming the file
+            if options.scan:
+                budget.phase = "scanning"
+                context = make_context(path, options, warnings)
+                matches = scan_module(command, cst.parse_module(source), path, context)
+
+                if ranges is not None:
+                    lines = LineRanges(ranges)
+                    matches = [match for match in matches if match.line in lines]
+
+                return FileResult(path, warnings=warnings, matches=matches), None
+
+            output = None
+            cached = False
+            profile = None
+
+            if cache is not None:
+                # The commands' output depends on the module and package of the file
+                cache_context = "\0".join(name or "" for name in module_and_package(path, options))
+                cached_result = cache.get(source, cache_context)
+
+                if cached_result is not None:
+                    output, cached_warnings = cached_result
+                    cached = True
+                    warnings.extend(cached_warnings)
+
+            if output is None and options.profile:
+                # Time each step of the transformation, bypassing the cache
+                budget.phase = "profiling"
+                context = make_context(path, options, warnings)
+                instruments = [budget.limit]
+
+                if ranges is not None:
+                    instruments.append(LineRanges(ranges).limit)
+
+                output, profile = profile_source(
+                    command, source, context, options.formatter, instruments
+                )
+            elif output is None:
+                output = transform_source(command, source, path, options, warnings, budget, ranges)
+
+                if cache is not None:
+                    cache.put(source, output, warnings, cache_context)
+
+            # Unchanged files are left untouched, keeping their modification time
+            if output == source:
+                return FileResult(path, cached=cached, warnings=warnings, profile=profile), None
+
+            if options.diff:
+                diff = unified_diff(path, source, output)
+
+                return (
+                    FileResult(
+                        path,
+                        changed=True,
+                        cached=cached,
+                        warnings=warnings,
+                        profile=profile,
+                        diff=diff,
+                    ),
+                    None,
+                )
+
+            return (
+                FileResult(path, changed=True, cached=cached, warnings=warnings, profile=profile),
+                output,
+            )
+    except BudgetExceeded as ex:
+        return FileResult(path, skip_reason=str(ex), warnings=warnings, overrun=ex.overrun), None
+    except SkipFile as ex:
+        return FileResult(path, skip_reason=str(ex), warnings=warnings), None
+    except Exception:
+        return FileResult(path, error=traceback.format_exc(), warnings=warnings), None
+
+
+class PatchOutput:
+    # Unified diffs written by the workers, as soon as each file is processed, into a file
+    # descriptor they inherit rather than sent to the parent, a lock keeping each file's
+    # diff in one piece
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.renew()
+
+    def renew(self) -> None:
+        # Replaces the lock, which a worker that died may have left acquired, for the workers
+        # started from now on
+        self.lock = get_context("fork" if "fork" in get_all_start_methods() else None).Lock()
+
+    def write(self, diff: bytes) -> None:
+        if not self.lock.acquire(timeout=PATCH_LOCK_SECONDS):
+            raise TimeoutError("Timed out waiting for the lock of the patch.")
+
+        try:
+            view = memoryview(diff)
+            written = 0
+
+            # Writes to pipes may be partial
+            while written < len(view):
+                written += os.write(self.fd, view[written:])
+        finally:
+            self.lock.release()
+
+
+def write_diff(result: FileResult, patch: Optional[PatchOutput]) -> FileResult:
+    if patch is None or result.diff is None:
+        return result
+
+    try:
+        patch.write(result.diff)
+    except Exception:
+        return replace(result, diff=None, error=traceback.format_exc())
+
+    return replace(result, diff=None)
+
+
+def write_result(result: FileResult, output: bytes) -> FileResult:
+    try:
+        write_file(result.path, output)
+    except Exception:
+        return replace(result, changed=False, error=traceback.format_exc())
+
+    return result
+
+
+def run_file(
+    command: Type[VisitorBasedCodemodCommand],
+    path: str,
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+    patch: Optional[PatchOutput] = None,
+) -> FileResult:
+    try:
+        source = read_file(path)
+    except Exception:
+        return FileResult(path, error=traceback.format_exc())
+
+    result, output = process_source(command, path, source, options, cache)
+    result = write_diff(result, patch)
+
+    return result if output is None else write_result(result, output)
+
+
+def prefetch(
+    executor: ThreadPoolExecutor, paths: Iterable[str], size: int
+) -> Iterator[Tuple[str, "Future[bytes]"]]:
+    # Yields the files with the future of their content, reading at most size files ahead
+    pending: Deque[Tuple[str, "Future[bytes]"]] = deque()
+
+    for path in paths:
+        pending.append((path, executor.submit(read_file, path)))
+
+        if len(pending) >= size:
+            yield pending.popleft()
+
+    yield from pending
+
+
+def schedule(
+    files: Iterable[Tuple[str, int]],
+    chunk_files: int = CHUNK_FILES,
+    chunk_bytes: int = CHUNK_BYTES,
+    isolate_size: Optional[int] = None,
+) -> List[List[str]]:
+    # Groups the files in chunks of at most chunk_files files or chunk_bytes bytes, largest
+    # files first, so the biggest jobs start early and don't leave a long tail. Files
+    # bigger than isolate_size are in a chunk of their own
+    chunks: List[List[str]] = []
+    chunk: List[str] = []
+    size = 0
+
+    for path, file_size in sorted(files, key=lambda file: file[1], reverse=True):
+        if isolate_size is not None and file_size > isolate_size:
+            chunks.append([path])
+            continue
+
+        if chunk and (len(chunk) >= chunk_files or size + file_size > chunk_bytes):
+            chunks.append(chunk)
+            chunk, size = [], 0
+
+        chunk.append(path)
+        size += file_size
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def preload(command: Type[VisitorBasedCodemodCommand]) -> None:
+    # Imports the commands and builds their matchers and trigger patterns once, before
+    # forking the workers
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    trigger_pattern(command)
+
+
+def iter_chunk(
+    command: Type[VisitorBasedCodemodCommand],
+    paths: Sequence[str],
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+    patch: Optional[PatchOutput] = None,
+    transforming: Optional[Callable[[bool], None]] = None,
+) -> Iterator[FileResult]:
+    # Yields the results of the files as soon as they're written, not necessarily in order.
+    # transforming is called with True before each file's transform and False after it, so
+    # the time of its reads and writes can be told apart
+    def transform(path: str, source: bytes) -> Tuple[FileResult, Optional[bytes]]:
+        if transforming is not None:
+            transforming(True)
+
+        try:
+            result, output = process_source(command, path, source, options, cache)
+        finally:
+            if transforming is not None:
+                transforming(False)
+
+        return write_diff(result, patch), output
+
+    if options.io_threads <= 0 or len(paths) < 2:
+        for path in paths:
+            try:
+                source = read_file(path)
+            except Exception:
+                yield FileResult(path, error=traceback.format_exc())
+                continue
+
+            result, output = transform(path, source)
+
+            yield result if output is None else write_result(result, output)
+
+        return
+
+    # Overlaps the files' reads and writes, which can be slow on network storage, with the
+    # transforms: reads run ahead and writes behind, at most 2 per thread being queued
+    writes: Deque["Future[FileResult]"] = deque()
+    queue_size = 2 * options.io_threads
+
+    with ThreadPoolExecutor(options.io_threads) as executor:
+        for path, future in prefetch(executor, paths, queue_size):
+            try:
+                source = future.result()
+            except Exception:
+                yield FileResult(path, error=traceback.format_exc())
+                continue
+
+            result, output = transform(path, source)
+
+            if output is None:
+                yield result
+                continue
+
+            writes.append(executor.submit(write_result, result, output))
+
+            if len(writes) >= queue_size:
+                yield writes.popleft().result()
+
+        for write in writes:
+            yield write.result()
+
+
+def run_chunk(
+    command: Type[VisitorBasedCodemodCommand],
+    paths: Sequence[str],
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+    patch: Optional[PatchOutput] = None,
+) -> List[FileResult]:
+    # Results of the files in their order
+    order = {path: i for i, path in enumerate(paths)}
+
+    return sorted(
+        iter_chunk(command, paths, options, cache, patch), key=lambda result: order[result.path]
+    )
+
+
+def current_rss() -> int:
+    # Resident set size in bytes, the peak one where /proc isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def work(
+    connection: Connection,
+    command: Type[VisitorBasedCodemodCommand],
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+    patch: Optional[PatchOutput] = None,
+) -> None:
+    # Runs the chunks received from the parent until it sends None, replying with each
+    # file's result as soon as it's written and, at the end of each chunk, the worker's
+    # resident memory. With a time budget, the start and end of each file's transform are
+    # sent too for the parent to catch the transforms stuck past their budget
+    preload(command)
+
+    def transforming(started: bool) -> None:
+        connection.send(("transforming", started))
+
+    try:
+        for paths in iter(connection.recv, None):
+            for result in iter_chunk(
+                command,
+                paths,
+                options,
+                cache,
+                patch,
+                transforming if options.max_seconds is not None else None,
+            ):
+                connection.send(("result", result))
+
+            connection.send(("done", current_rss()))
+    except EOFError:
+        pass
+
+
+@dataclass
+class Worker:
+    process: BaseProcess
+    connection: Connection
+    chunk: Optional[List[str]] = None
+    # Files of the chunk whose result wasn't received yet
+    pending: List[str] = field(default_factory=list)
+    files: int = 0
+    # Time after which the worker is considered stuck on its current transform and killed
+    deadline: Optional[float] = None
+    # Lock of the patch the worker was started with
+    patch_lock: Optional[object] = None
+
+    def send(self, chunk: List[str]) -> None:
+        self.chunk = chunk
+        self.pending = list(chunk)
+        self.deadline = None
+        self.connection.send(chunk)
+
+    def transforming(self, started: bool, max_seconds: Optional[float]) -> None:
+        # Files are interrupted by the worker itself after max_seconds, the deadline only
+        # catches the ones stuck where they cannot be interrupted, i.e. in native code
+        self.deadline = (
+            time.monotonic() + WATCHDOG_FACTOR * max_seconds + WATCHDOG_GRACE
+            if started and max_seconds is not None
+            else None
+        )
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+
+        self.process.join()
+        self.connection.close()
+
+
+def run_workers(
+    command: Type[VisitorBasedCodemodCommand],
+    chunks: List[List[str]],
+    options: RunOptions,
+    cache: Optional[ResultCache],
+    jobs: int,
+    limits: WorkerLimits,
+    isolated: Iterable[str] = (),
+    patch: Optional[PatchOutput] = None,
+) -> Iterator[FileResult]:
+    # Sends the chunks to the workers as they become idle, replacing the workers which
+    # reached their limits or processed an isolated file, the files of a chunk without a
+    # result when its worker dies are reported as failed. A worker dying may leave the lock
+    # of the patch acquired, so the lock is renewed and the workers still sharing the old one
+    # are replaced once their chunk is done
+    context = get_context("fork" if "fork" in get_all_start_methods() else None)
+    isolated = set(isolated)
+    pending = chunks[::-1]
+    workers: List[Worker] = []
+
+    def stale(worker: Worker) -> bool:
+        return patch is not None and worker.patch_lock is not patch.lock
+
+    def died(worker: Worker) -> None:
+        workers.remove(worker)
+
+        if patch is not None:
+            patch.renew()
+
+    try:
+        while pending or workers:
+            for worker in [worker for worker in workers if worker.chunk is None and stale(worker)]:
+                worker.stop()
+                workers.remove(worker)
+
+            for worker in workers:
+                if worker.chunk is None and pending:
+                    worker.send(pending.pop())
+
+            while pending and len(workers) < jobs:
+                connection, child_connection = context.Pipe()
+                process = context.Process(
+                    target=work,
+                    args=(child_connection, command, options, cache, patch),
+                    daemon=True,
+                )
+                process.start()
+                child_connection.close()
+
+                worker = Worker(
+                    process, connection, patch_lock=patch.lock if patch is not None else None
+                )
+                worker.send(pending.pop())
+                workers.append(worker)
+
+            busy = [worker for worker in workers if worker.chunk is not None]
+
+            if not busy:
+                for worker in workers:
+                    worker.stop()
+
+                workers = []
+                continue
+
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            ready = wait([worker.connection for worker in busy], timeout)
+
+            for worker in busy:
+                if worker.connection not in ready:
+                    if worker.deadline is not None and time.monotonic() >= worker.deadline:
+                        worker.process.kill()
+                        worker.process.join()
+                        worker.connection.close()
+                        died(worker)
+
+                        yield from (
+                            FileResult(path, error="Worker killed, stuck past the file's budget.")
+                            for path in worker.pending
+                        )
+
+                    continue
+
+                try:
+                    kind, value = worker.connection.recv()
+                except EOFError:
+                    worker.process.join()
+                    died(worker)
+
+                    yield from (
+                        FileResult(
+                            path, error=f"Worker exited with code {worker.process.exitcode}."
+                        )
+                        for path in worker.pending
+                    )
+                    continue
+
+                if kind == "transforming":
+                    worker.transforming(value, options.max_seconds)
+                    continue
+
+                if kind == "result":
+                    worker.pending.remove(value.path)
+                    yield value
+                    continue
+
+                # The chunk is done, value being the worker's resident memory
+                chunk = worker.chunk or []
+                worker.chunk = None
+                worker.files += len(chunk)
+
+                if (
+                    (limits.max_files is not None and worker.files >= limits.max_files)
+                    or (limits.max_rss is not None and value > limits.max_rss)
+                    or any(path in isolated for path in chunk)
+                    or stale(worker)
+                ):
+                    worker.stop()
+                    workers.remove(worker)
+    finally:
+        for worker in workers:
+            worker.process.terminate()
+            worker.process.join()
+
+
+def run(
+    command: Type[VisitorBasedCodemodCommand],
+    files: Iterable[Tuple[str, int]],
+    options: RunOptions,
+    cache: Optional[ResultCache] = None,
+    jobs: Optional[int] = None,
+    limits: WorkerLimits = WorkerLimits(),
+    patch: Optional[PatchOutput] = None,
+) -> Iterator[FileResult]:
+    # Yields the results of running the command on the files as soon as they're available.
+    # With a patch the diffs are written into it by the workers and not part of the results
+    preload(command)
+
+    sizes: Dict[str, int] = dict(files)
+    chunks = schedule(
+        sizes.items(),
+        chunk_files=min(CHUNK_FILES, limits.max_files or CHUNK_FILES),
+        isolate_size=limits.isolate_size,
+    )
+
+    if jobs == 1:
+        for chunk in chunks:
+            yield from run_chunk(command, chunk, options, cache, patch)
+    else:
+        isolated = (
+            path
+            for path, size in sizes.items()
+            if limits.isolate_size is not None and size > limits.isolate_size
+        )
+
+        yield from run_workers(
+            command, chunks, options, cache, jobs or os.cpu_count() or 1, limits, isolated, patch
+        )
+
+    if cache is not None:
+        cache.prune()
@@ -0,0 +1,135 @@
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple, Type, Union
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+from libcst.metadata import MetadataWrapper, PositionProvider
+
+from codemods.fused import FusedCodemodCommand
+from codemods.pipeline import PipelineCodemodCommand
+from codemods.prefilter import command_name
+
+
+@dataclass(frozen=True)
+class Match:
+    file: str
+    line: int
+    column: int
+    command: str
+    old: str
+    new: str
+
+
+def changed_lines(
+    module: cst.Module, original_node: cst.CSTNode, node: cst.CSTNode
+) -> Tuple[str, str]:
+    # Returns the first line of the node's code changed by the command
+    old_lines = [line.strip() for line in module.code_for_node(original_node).splitlines()]
+    new_lines = [line.strip() for line in module.code_for_node(node).splitlines()]
+    old_lines = [line for line in old_lines if line]
+    new_lines = [line for line in new_lines if line]
+
+    for i in range(max(len(old_lines), len(new_lines))):
+        old = old_lines[i] if i < len(old_lines) else ""
+        new = new_lines[i] if i < len(new_lines) else ""
+
+        if old != new:
+            return old, new
+
+    return old_lines[0] if old_lines else "", new_lines[0] if new_lines else ""
+
+
+class ScanVisitor(cst.CSTVisitor):
+    # Runs the commands' hooks on the original nodes without building the updated tree,
+    # a node returned by a leave_* hook different from the original one is a match
+
+    METADATA_DEPENDENCIES = (PositionProvider,)
+
+    def __init__(
+        self, module: cst.Module, path: str, commands: Sequence[VisitorBasedCodemodCommand]
+    ):
+        super().__init__()
+
+        self.module = module
+        self.path = path
+        self.commands = commands
+        self.skipped: List[Optional[cst.CSTNode]] = [None] * len(commands)
+        self.matches: List[Match] = []
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        visit_children = False
+
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is not None:
+                continue
+
+            if command.on_visit(node):
+                visit_children = True
+            else:
+                self.skipped[i] = node
+
+        return visit_children
+
+    def on_leave(self, original_node: cst.CSTNode) -> None:
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is original_node:
+                self.skipped[i] = None
+            elif self.skipped[i] is not None:
+                continue
+
+            updated_node: Union[
+                cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel[cst.CSTNode]
+            ] = command.on_leave(original_node, original_node)
+
+            if updated_node is original_node:
+                continue
+
+            position = self.get_metadata(PositionProvider, original_node).start
+
+            if isinstance(updated_node, cst.CSTNode):
+                old, new = changed_lines(self.module, original_node, updated_node)
+            else:
+                old, new = changed_lines(self.module, original_node, original_node)[0], ""
+
+            self.matches.append(
+                Match(
+                    file=self.path,
+                    line=position.line,
+                    column=position.column,
+                    command=command_name(type(command)),
+                    old=old,
+                    new=new,
+                )
+            )
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is None:
+                command.on_visit_attribute(node, attribute)
+
+    def on_leave_attribute(self, original_node: cst.CSTNode, attribute: str) -> None:
+        for i, command in enumerate(self.commands):
+            if self.skipped[i] is None:
+                command.on_leave_attribute(original_node, attribute)
+
+
+def scan_module(
+    command: Type[VisitorBasedCodemodCommand],
+    module: cst.Module,
+    path: str,
+    context: Optional[CodemodContext] = None,
+) -> List[Match]:
+    # Fused commands and pipelines are scanned command by command, so each match reports
+    # the command which would change the code
+    commands = (
+        command.COMMANDS
+        if issubclass(command, (FusedCodemodCommand, PipelineCodemodCommand))
+        else [command]
+    )
+    wrapper = MetadataWrapper(module)
+    context = replace(context or CodemodContext(filename=path), wrapper=wrapper)
+    visitor = ScanVisitor(wrapper.module, path, [klass(context) for klass in commands])
+
+    wrapper.visit(visitor)
+
+    return visitor.matches
@@ -1,14 +1,17 @@
+import functools
+import os
 import textwrap
-from typing import List, Set, Tuple, Union
+from typing import List, Optional
 
 import libcst as cst
 from libcst import matchers
 from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
-from libcst.codemod.visitors import (
-    AddImportsVisitor,
-    GatherImportsVisitor,
-    RemoveImportsVisitor,
-)
+
+from codemods.fused import FusedCodemodCommand
+from codemods.renames import RenameCommand, load_renames
+
+# Renames of constants, symbols and methods, compiled once when loading the module
+RENAME_TABLES = load_renames(os.path.join(os.path.dirname(__file__), "wxpython.json"))
 
 
 class ColorToColourCommand(VisitorBasedCodemodCommand):
@@ -27,56 +30,16 @@ class ColorToColourCommand(VisitorBasedCodemodCommand):
         return updated_node
 
 
-class ConstantsRenameCommand(VisitorBasedCodemodCommand):
+class ConstantsRenameCommand(RenameCommand):
     DESCRIPTION: str = "Rename constants"
 
-    matchers_map = {
-        matchers.Attribute(
-            value=matchers.Name(value="wx"), attr=matchers.Name(value=name)
-        ): renamed
-        for name, renamed in [
-            ("WXK_PRIOR", "WXK_PAGEUP"),
-            ("WXK_NEXT", "WXK_PAGEDOWN"),
-            ("WXK_NUMPAD_PRIOR", "WXK_NUMPAD_PAGEUP"),
-            ("WXK_NUMPAD_NEXT", "WXK_NUMPAD_PAGEDOWN"),
-            ("OPEN", "FD_OPEN"),
-            ("FILE_MUST_EXIST", "FD_FILE_MUST_EXIST"),
-            ("TE_LINEWRAP", "TE_BESTWRAP"),
-        ]
-    }
+    RENAMES = RENAME_TABLES["ConstantsRenameCommand"]
 
-    def leave_Attribute(
-        self, original_node: cst.Attribute, updated_node: cst.Attribute
-    ) -> cst.Attribute:
-        for matcher, renamed in self.matchers_map.items():
-            if matchers.matches(updated_node, matcher):
-                return updated_node.with_changes(attr=cst.Name(value=renamed))
 
-        return updated_node
-
-
-class FixImportFromAdvCommand(VisitorBasedCodemodCommand):
+class FixImportFromAdvCommand(RenameCommand):
     DESCRIPTION: str = "Fix importing symbols now moved into wx.adv package"
 
-    matchers = [
-        matchers.Attribute(value=matchers.Name(value="wx"), attr=matchers.Name(value=name))
-        for name in ["DatePickerCtrl", "DP_ALLOWNONE", "DP_DROPDOWN", "DP_SHOWCENTURY"]
-    ]
-
-    def leave_Attribute(
-        self, original_node: cst.Attribute, updated_node: cst.Attribute
-    ) -> cst.Attribute:
-        for matcher in self.matchers:
-            if matchers.matches(updated_node, matcher):
-                # Ensure that wx.adv is imported
-                AddImportsVisitor.add_needed_import(self.context, "wx.adv")
-
-                # Return modified node
-                return updated_node.with_changes(
-                    value=cst.Attribute(value=cst.Name(value="wx"), attr=cst.Name(value="adv"))
-                )
-
-        return updated_node
+    RENAMES = RENAME_TABLES["FixImportFromAdvCommand"]
 
 
 class FlexGridSizerCommand(VisitorBasedCodemodCommand):
@@ -98,24 +61,11 @@ class FlexGridSizerCommand(VisitorBasedCodemodCommand):
         return updated_node
 
 
-class MenuAppendCommand(VisitorBasedCodemodCommand):
+class MenuAppendCommand(RenameCommand):
     DESCRIPTION: str = "Migrate to wx.MenuAppend() method and update keywords"
 
-    args_map = {"help": "helpString", "text": "item"}
-    args_matchers_map = {
-        matchers.Arg(keyword=matchers.Name(value=value)): renamed
-        for value, renamed in args_map.items()
-    }
-    call_matcher = matchers.Call(
-        func=matchers.Attribute(attr=matchers.Name(value="Append")),
-        args=matchers.MatchIfTrue(
-            lambda args: bool(
-                set(arg.keyword.value for arg in args if arg and arg.keyword).intersection(
-                    MenuAppendCommand.args_map.keys()
-                )
-            )
-        ),
-    )
+    RENAMES = RENAME_TABLES["MenuAppendCommand"]
+
     deprecated_call_matcher = matchers.Call(
         func=matchers.Attribute(attr=matchers.Name(value="AppendItem")),
         args=[matchers.DoNotCare()],
@@ -129,173 +79,43 @@ class MenuAppendCommand(VisitorBasedCodemodCommand):
             )
 
         # Update keywords
-        if matchers.matches(updated_node, self.call_matcher):
-            updated_node_args = list(updated_node.args)
-
-            for arg_matcher, renamed in self.args_matchers_map.items():
-                for i, node_arg in enumerate(updated_node.args):
-                    if matchers.matches(node_arg, arg_matcher):
-                        updated_node_args[i] = node_arg.with_changes(
-                            keyword=cst.Name(value=renamed)
-                        )
-
-                updated_node = updated_node.with_changes(args=updated_node_args)
-
-        return updated_node
+        return super().leave_Call(original_node, updated_node)
 
 
-class ToolbarAddToolCommand(VisitorBasedCodemodCommand):
+class ToolbarAddToolCommand(RenameCommand):
     DESCRIPTION: str = "Transforms wx.Toolbar.DoAddTool method into AddTool"
 
-    args_map = {"id": "toolId"}
-    args_matchers_map = {
-        matchers.Arg(keyword=matchers.Name(value=value)): renamed
-        for value, renamed in args_map.items()
-    }
-    call_matcher = matchers.Call(
-        func=matchers.Attribute(attr=matchers.Name(value="DoAddTool")),
-        args=matchers.MatchIfTrue(
-            lambda args: bool(
-                set(arg.keyword.value for arg in args if arg and arg.keyword).intersection(
-                    ToolbarAddToolCommand.args_map.keys()
-                )
-            )
-        ),
-    )
+    RENAMES = RENAME_TABLES["ToolbarAddToolCommand"]
 
     def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
-        if matchers.matches(updated_node, self.call_matcher):
-            # Update method's call
-            updated_node = updated_node.with_changes(
-                func=updated_node.func.with_changes(attr=cst.Name(value="AddTool"))
-            )
-
-            # Transform keywords
-            updated_node_args = list(updated_node.args)
+        # Transform keywords
+        renamed_node = super().leave_Call(original_node, updated_node)
 
-            for arg_matcher, renamed in self.args_matchers_map.items():
-                for i, node_arg in enumerate(updated_node.args):
-                    if matchers.matches(node_arg, arg_matcher):
-                        updated_node_args[i] = node_arg.with_changes(
-                            keyword=cst.Name(value=renamed)
-                        )
-
-                updated_node = updated_node.with_changes(args=updated_node_args)
+        # Update method's call only if it's called with the renamed keywords
+        if renamed_node is not updated_node:
+            return renamed_node.with_changes(
+                func=renamed_node.func.with_changes(attr=cst.Name(value="AddTool"))
+            )
 
-        return updated_node
+        return renamed_node
 
 
-class SizerAddCommand(VisitorBasedCodemodCommand):
+class SizerAddCommand(RenameCommand):
     DESCRIPTION: str = "Transforms wx.Sizer.AddWindow method into Add"
 
-    matcher = matchers.Call(func=matchers.Attribute(attr=matchers.Name(value="AddWindow")))
-
-    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
-        if matchers.matches(updated_node, self.matcher):
-            return updated_node.with_changes(
-                func=updated_node.func.with_changes(attr=cst.Name(value="Add"))
-            )
-
-        return updated_node
+    RENAMES = RENAME_TABLES["SizerAddCommand"]
 
 
-class ListCtrlInsertColumnCommand(VisitorBasedCodemodCommand):
+class ListCtrlInsertColumnCommand(RenameCommand):
     DESCRIPTION: str = "Transforms wx.ListCtrl.InsertColumnInfo method into InsertColumn"
 
-    matcher = matchers.Call(func=matchers.Attribute(attr=matchers.Name(value="InsertColumnInfo")))
+    RENAMES = RENAME_TABLES["ListCtrlInsertColumnCommand"]
 
-    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
-        if matchers.matches(updated_node, self.matcher):
-            return updated_node.with_changes(
-                func=updated_node.func.with_changes(attr=cst.Name(value="InsertColumn"))
-            )
-
-        return updated_node
 
-
-class DeprecationWarningsCommand(VisitorBasedCodemodCommand):
+class DeprecationWarningsCommand(RenameCommand):
     DESCRIPTION: str = "Rename deprecated methods"
 
-    deprecated_symbols_map: List[Tuple[str, Union[str, Tuple[str, str]]]] = [
-        ("BitmapFromImage", "Bitmap"),
-        ("ImageFromStream", "Image"),
-        ("EmptyIcon", "Icon"),
-        ("DateTimeFromDMY", ("DateTime", "FromDMY")),
-    ]
-    matchers_short_map = {
-        (value, matchers.Call(func=matchers.Name(value=value)), renamed)
-        for value, renamed in deprecated_symbols_map
-    }
-    matchers_full_map = {
-        (
-            matchers.Call(
-                func=matchers.Attribute(
-                    value=matchers.Name(value="wx"), attr=matchers.Name(value=value)
-                )
-            ),
-            renamed,
-        )
-        for value, renamed in deprecated_symbols_map
-    }
-
-    def __init__(self, context: CodemodContext):
-        super().__init__(context)
-
-        self.wx_imports: Set[str] = set()
-
-    def visit_Module(self, node: cst.Module) -> None:
-        # Collect current list of imports
-        gatherer = GatherImportsVisitor(self.context)
-
-        node.visit(gatherer)
-
-        # Store list of symbols imported from wx package
-        self.wx_imports = gatherer.object_mapping.get("wx", set())
-
-    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
-        # Matches calls with symbols without the wx prefix
-        for symbol, matcher, renamed in self.matchers_short_map:
-            if symbol in self.wx_imports and matchers.matches(updated_node, matcher):
-                # Remove the symbol's import
-                RemoveImportsVisitor.remove_unused_import_by_node(self.context, original_node)
-
-                # Add import of top level wx package
-                AddImportsVisitor.add_needed_import(self.context, "wx")
-
-                # Return updated node
-                if isinstance(renamed, tuple):
-                    return updated_node.with_changes(
-                        func=cst.Attribute(
-                            value=cst.Attribute(
-                                value=cst.Name(value="wx"), attr=cst.Name(value=renamed[0])
-                            ),
-                            attr=cst.Name(value=renamed[1]),
-                        )
-                    )
-
-                return updated_node.with_changes(
-                    func=cst.Attribute(value=cst.Name(value="wx"), attr=cst.Name(value=renamed))
-                )
-
-        # Matches full calls like wx.MySymbol
-        for matcher, renamed in self.matchers_full_map:
-            if matchers.matches(updated_node, matcher):
-                if isinstance(renamed, tuple):
-                    return updated_node.with_changes(
-                        func=cst.Attribute(
-                            value=cst.Attribute(
-                                value=cst.Name(value="wx"), attr=cst.Name(value=renamed[0])
-                            ),
-                            attr=cst.Name(value=renamed[1]),
-                        )
-                    )
-
-                return updated_node.with_changes(
-                    func=updated_node.func.with_changes(attr=cst.Name(value=renamed))
-                )
-
-        # Returns updated node
-        return updated_node
+    RENAMES = RENAME_TABLES["DeprecationWarningsCommand"]
 
 
 class MakeModalCommand(VisitorBasedCodemodCommand):
@@ -313,49 +133,71 @@ class MakeModalCommand(VisitorBasedCodemodCommand):
         )
     )
 
-    method_cst = cst.parse_statement(
-        textwrap.dedent(
-            """
-            def MakeModal(self, modal=True):
-                if modal and not hasattr(self, '_disabler'):
-                    self._disabler = wx.WindowDisabler(self)
-                if not modal and hasattr(self, '_disabler'):
-                    del self._disabler
-            """
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def method_cst() -> cst.BaseStatement:
+        # Parsed on first use rather than when importing the module
+        return cst.parse_statement(
+            textwrap.dedent(
+                """
+                def MakeModal(self, modal=True):
+                    if modal and not hasattr(self, '_disabler'):
+                        self._disabler = wx.WindowDisabler(self)
+                    if not modal and hasattr(self, '_disabler'):
+                        del self._disabler
+                """
+            )
         )
-    )
 
     def __init__(self, context: CodemodContext):
         super().__init__(context)
 
-        self.stack: List[cst.ClassDef] = []
+        # For each class being visited: None if the class already has a MakeModal() method,
+        # otherwise if the method must be added to the class
+        self.stack: List[Optional[bool]] = []
 
     def visit_ClassDef(self, node: cst.ClassDef) -> None:
-        self.stack.append(node)
+        has_make_modal_method = any(
+            matchers.matches(statement, self.method_matcher) for statement in node.body.body
+        )
+
+        self.stack.append(None if has_make_modal_method else False)
 
     def leave_ClassDef(
         self, original_node: cst.ClassDef, updated_node: cst.ClassDef
     ) -> cst.ClassDef:
-        return self.stack.pop()
-
-    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
-        if matchers.matches(updated_node, self.call_matcher):
-            # Search for MakeModal() method
-            current_class = self.stack[-1]
-            has_make_modal_method = False
-
-            for method in current_class.body.body:
-                if matchers.matches(method, self.method_matcher):
-                    has_make_modal_method = True
-
-            # If not, add it to the current class
-            if not has_make_modal_method:
-                current_class = current_class.with_changes(
-                    body=current_class.body.with_changes(
-                        body=[*current_class.body.body, self.method_cst]
-                    )
+        if self.stack.pop():
+            return updated_node.with_changes(
+                body=updated_node.body.with_changes(
+                    body=[*updated_node.body.body, self.method_cst()]
                 )
+            )
+
+        return updated_node
 
-                self.stack[-1] = current_class
+    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
+        if (
+            self.stack
+            and self.stack[-1] is False
+            and matchers.matches(updated_node, self.call_matcher)
+        ):
+            self.stack[-1] = True
 
         return updated_node
+
+
+class WxPythonMigrationCommand(FusedCodemodCommand):
+    DESCRIPTION: str = "Runs all the wxPython 2.8 to 4.x migrations in a single pass"
+
+    COMMANDS = [
+        ColorToColourCommand,
+        ConstantsRenameCommand,
+        FixImportFromAdvCommand,
+        FlexGridSizerCommand,
+        MenuAppendCommand,
+        ToolbarAddToolCommand,
+        SizerAddCommand,
+        ListCtrlInsertColumnCommand,
+        DeprecationWarningsCommand,
+        MakeModalCommand,
+    ]
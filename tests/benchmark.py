@@ -0,0 +1,265 @@
+import argparse
+import inspect
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import textwrap
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from libcst.codemod import VisitorBasedCodemodCommand
+
+from codemods import mypy, wxpython
+from codemods.paths import iter_files
+from codemods.runner import RunOptions, run
+
+SNIPPETS = [
+    """
+    class {name}Frame(wx.Frame):
+        def __init__(self, parent):
+            wx.Frame.__init__(self, parent)
+            self.SetBackgroundColour(wx.Color(255, 255, 255))
+            self.MakeModal()
+
+        def on_close(self, event):
+            self.MakeModal(False)
+            self.Destroy()
+    """,
+    """
+    def build_{name}_menu(menu):
+        item = wx.MenuItem(menu, wx.ID_ANY, "Item")
+        menu.AppendItem(item)
+        menu.Append(help="Open a file", id=wx.ID_OPEN, kind=wx.ITEM_NORMAL, text="Open")
+        return menu
+    """,
+    """
+    def layout_{name}(panel, children):
+        sizer = wx.FlexGridSizer(2, 0)
+        for child in children:
+            sizer.AddWindow(child, 0, border=5, flag=wx.EXPAND | wx.ALL)
+        panel.SetSizer(sizer)
+    """,
+    """
+    def {name}_images(image, stream):
+        bitmap = wx.BitmapFromImage(image)
+        icon = wx.EmptyIcon()
+        picture = wx.ImageFromStream(stream)
+        date = wx.DateTimeFromDMY(1, 1, 2000)
+        return bitmap, icon, picture, date
+    """,
+    """
+    def {name}_toolbar(toolbar, bitmap, list_ctrl, info):
+        toolbar.DoAddTool(bitmap=bitmap, id=wx.ID_ANY, label="Tool")
+        list_ctrl.InsertColumnInfo(0, info)
+        picker = wx.DatePickerCtrl(toolbar, style=wx.DP_DROPDOWN | wx.DP_SHOWCENTURY)
+        return picker, wx.WXK_PRIOR, wx.FILE_MUST_EXIST
+    """,
+]
+FILLER = """
+    def {name}(values, factor=2):
+        result = []
+        for value in values:
+            if value % factor:
+                result.append(value * factor)
+            else:
+                result.append(value // factor)
+        return {{"name": "{name}", "result": result}}
+    """
+
+
+@dataclass(frozen=True)
+class Corpus:
+    files: int = 200
+    lines: int = 300
+    density: float = 0.3
+    wx_ratio: float = 0.5
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class Measure:
+    files_per_sec: float
+    lines_per_sec: float
+    peak_rss: int
+
+
+def generate_module(rng: random.Random, lines: int, density: float, wx: bool) -> str:
+    # Generates a module of about the given number of lines where the given fraction of
+    # the blocks uses wxPython 2.8 APIs
+    blocks = ["import wx\n" if wx else "import os\n"]
+    count = 0
+
+    while count < lines:
+        name = f"block_{len(blocks)}"
+        template = rng.choice(SNIPPETS) if wx and rng.random() < density else FILLER
+        block = textwrap.dedent(template.format(name=name))
+
+        blocks.append(block)
+        count += block.count("\n")
+
+    return "\n".join(blocks)
+
+
+def generate_corpus(directory: str, corpus: Corpus) -> int:
+    # Writes the corpus' files into the directory, returns the total number of lines
+    rng = random.Random(corpus.seed)
+    total_lines = 0
+
+    for i in range(corpus.files):
+        code = generate_module(rng, corpus.lines, corpus.density, rng.random() < corpus.wx_ratio)
+        total_lines += code.count("\n")
+
+        with open(os.path.join(directory, f"module_{i}.py"), "w") as f:
+            f.write(code)
+
+    return total_lines
+
+
+def commands() -> List[Type[VisitorBasedCodemodCommand]]:
+    return [
+        obj
+        for module in (wxpython, mypy)
+        for _, obj in inspect.getmembers(module, inspect.isclass)
+        if issubclass(obj, VisitorBasedCodemodCommand)
+        and obj.__module__ == module.__name__
+        and not inspect.isabstract(obj)
+    ]
+
+
+def peak_rss() -> int:
+    # Peak resident set size in bytes, ru_maxrss is in kilobytes on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure(command: Type[VisitorBasedCodemodCommand], corpus: Corpus) -> Measure:
+    with tempfile.TemporaryDirectory() as directory:
+        lines = generate_corpus(directory, corpus)
+
+        start = time.perf_counter()
+        results = list(run(command, iter_files([directory]), RunOptions(formatter=[]), jobs=1))
+        elapsed = time.perf_counter() - start
+
+    return Measure(
+        files_per_sec=len(results) / elapsed, lines_per_sec=lines / elapsed, peak_rss=peak_rss()
+    )
+
+
+def measure_isolated(command: Type[VisitorBasedCodemodCommand], corpus: Corpus) -> Measure:
+    # Runs the measure in a new process, so the peak RSS is the command's one
+    with get_context("spawn").Pool(1) as pool:
+        return pool.apply(measure, (command, corpus))
+
+
+def compare(
+    results: Dict[str, Measure], baseline: Dict[str, Measure], tolerance: float
+) -> List[str]:
+    # Returns the commands which throughput is lower than the baseline's one
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline
+        and result.files_per_sec < baseline[name].files_per_sec * (1 - tolerance)
+    ]
+
+
+def load_baseline(path: str) -> Tuple[Corpus, Dict[str, Measure]]:
+    with open(path) as f:
+        data = json.load(f)
+
+    return Corpus(**data["corpus"]), {
+        name: Measure(**measure) for name, measure in data["results"].items()
+    }
+
+
+def save_baseline(path: str, corpus: Corpus, results: Dict[str, Measure]) -> None:
+    data = {
+        "corpus": asdict(corpus),
+        "results": {name: asdict(measure) for name, measure in results.items()},
+    }
+
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measures the throughput of the codemods over a synthetic wxPython corpus"
+    )
+    parser.add_argument("--files", type=int, default=Corpus.files, help="Number of files")
+    parser.add_argument("--lines", type=int, default=Corpus.lines, help="Lines per file")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=Corpus.density,
+        help="Fraction of the blocks using wxPython 2.8 APIs in files importing wx",
+    )
+    parser.add_argument(
+        "--wx-ratio", type=float, default=Corpus.wx_ratio, help="Fraction of files importing wx"
+    )
+    parser.add_argument("--seed", type=int, default=Corpus.seed, help="Corpus' random seed")
+    parser.add_argument("-k", dest="filter", default="", help="Only commands containing this")
+    parser.add_argument("--save", metavar="PATH", help="Save the results as baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare results with a baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Allowed throughput's decrease from the baseline, defaults to 10%%",
+    )
+
+    args = parser.parse_args(argv)
+    corpus = Corpus(
+        files=args.files,
+        lines=args.lines,
+        density=args.density,
+        wx_ratio=args.wx_ratio,
+        seed=args.seed,
+    )
+    results: Dict[str, Measure] = {}
+
+    print(f"{'Command':<50} {'files/s':>10} {'lines/s':>12} {'peak RSS MB':>12}")
+
+    for command in commands():
+        name = f"{command.__module__}.{command.__name__}"
+
+        if args.filter not in name:
+            continue
+
+        result = measure_isolated(command, corpus)
+        results[name] = result
+
+        print(
+            f"{name:<50} {result.files_per_sec:>10.1f} {result.lines_per_sec:>12.1f} "
+            f"{result.peak_rss / 1024 / 1024:>12.1f}"
+        )
+
+    if args.save:
+        save_baseline(args.save, corpus, results)
+
+    if args.baseline:
+        baseline_corpus, baseline = load_baseline(args.baseline)
+
+        if baseline_corpus != corpus:
+            print(f"Baseline measured on a different corpus: {baseline_corpus}", file=sys.stderr)
+
+        regressions = compare(results, baseline, args.tolerance)
+
+        for name in regressions:
+            print(f"Throughput regression: {name}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
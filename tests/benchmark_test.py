@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+import libcst as cst
+
+from codemods.wxpython import MakeModalCommand, WxPythonMigrationCommand
+from tests.benchmark import (
+    Corpus,
+    Measure,
+    commands,
+    compare,
+    generate_module,
+    load_baseline,
+    save_baseline,
+)
+
+
+class GenerateModuleTests(TestCase):
+    def test_valid_python(self) -> None:
+        code = generate_module(random.Random(0), 200, 0.5, True)
+
+        cst.parse_module(code)
+
+    def test_wx_apis(self) -> None:
+        code = generate_module(random.Random(0), 500, 1.0, True)
+
+        for token in ["MakeModal", "AppendItem", "AddWindow", "BitmapFromImage"]:
+            self.assertIn(token, code)
+
+    def test_no_wx_apis(self) -> None:
+        code = generate_module(random.Random(0), 500, 1.0, False)
+
+        self.assertNotIn("wx", code)
+
+
+class CommandsTests(TestCase):
+    def test_commands(self) -> None:
+        self.assertIn(MakeModalCommand, commands())
+        self.assertIn(WxPythonMigrationCommand, commands())
+
+
+class BaselineTests(TestCase):
+    def test_save_and_load(self) -> None:
+        corpus = Corpus(files=10)
+        results = {"command": Measure(files_per_sec=1.0, lines_per_sec=2.0, peak_rss=3)}
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+
+            save_baseline(path, corpus, results)
+
+            self.assertEqual(load_baseline(path), (corpus, results))
+
+    def test_compare(self) -> None:
+        baseline = {
+            "fast": Measure(files_per_sec=100.0, lines_per_sec=1.0, peak_rss=1),
+            "slow": Measure(files_per_sec=100.0, lines_per_sec=1.0, peak_rss=1),
+        }
+        results = {
+            "fast": Measure(files_per_sec=95.0, lines_per_sec=1.0, peak_rss=1),
+            "slow": Measure(files_per_sec=80.0, lines_per_sec=1.0, peak_rss=1),
+            "new": Measure(files_per_sec=1.0, lines_per_sec=1.0, peak_rss=1),
+        }
+
+        self.assertEqual(compare(results, baseline, 0.1), ["slow"])
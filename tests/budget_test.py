@@ -0,0 +1,151 @@
+import os
+import signal
+import tempfile
+import time
+from unittest import TestCase
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+
+from codemods.budget import Budget, BudgetExceeded
+from codemods.pipeline import pipeline
+from codemods.runner import RunOptions, WorkerLimits, run_file, run_workers
+from codemods.wxpython import ColorToColourCommand, SizerAddCommand
+
+
+class SleepCommand(VisitorBasedCodemodCommand):
+    # Stuck on the module's node
+    def visit_Module(self, node: cst.Module) -> None:
+        time.sleep(10)
+
+
+class UninterruptibleCommand(VisitorBasedCodemodCommand):
+    # Stuck where the worker's timer cannot interrupt it
+    def visit_Module(self, node: cst.Module) -> None:
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(10)
+
+
+class UninterruptibleOnMarkerCommand(VisitorBasedCodemodCommand):
+    # Stuck where the worker's timer cannot interrupt it on the modules with a marker
+    def visit_Module(self, node: cst.Module) -> None:
+        if node.header and node.header[0].comment:
+            signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+            time.sleep(10)
+
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        return updated_node.with_changes(footer=[cst.EmptyLine(comment=cst.Comment("# done"))])
+
+
+class BudgetTests(TestCase):
+    def transform(self, command: VisitorBasedCodemodCommand, budget: Budget) -> None:
+        budget.limit(command)
+
+        with budget.watchdog():
+            command.transform_module(cst.parse_module("wx.Color(0)\nsizer.AddWindow(panel)\n"))
+
+    def test_within_budget(self) -> None:
+        budget = Budget(max_seconds=10, max_nodes=100)
+
+        self.transform(ColorToColourCommand(CodemodContext()), budget)
+
+        self.assertGreater(budget.nodes, 0)
+
+    def test_nodes(self) -> None:
+        budget = Budget(max_nodes=5)
+        budget.phase = "transforming"
+
+        with self.assertRaises(BudgetExceeded) as cm:
+            self.transform(ColorToColourCommand(CodemodContext()), budget)
+
+        self.assertEqual(cm.exception.overrun.phase, "transforming")
+        self.assertEqual(cm.exception.overrun.nodes, 6)
+
+    def test_pipeline_nodes(self) -> None:
+        budget = Budget(max_nodes=10)
+        command = pipeline((ColorToColourCommand, SizerAddCommand))(CodemodContext())
+
+        with self.assertRaises(BudgetExceeded):
+            self.transform(command, budget)
+
+    def test_watchdog(self) -> None:
+        start = time.monotonic()
+
+        with self.assertRaises(BudgetExceeded) as cm:
+            self.transform(SleepCommand(CodemodContext()), Budget(max_seconds=0.1))
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertGreaterEqual(cm.exception.overrun.seconds, 0.1)
+        self.assertEqual(signal.getitimer(signal.ITIMER_REAL), (0.0, 0.0))
+
+
+class RunBudgetTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "module.py")
+
+        with open(self.path, "w") as f:
+            f.write("wx.Color(0)\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_skipped_and_untouched(self) -> None:
+        result = run_file(ColorToColourCommand, self.path, RunOptions(formatter=[], max_nodes=3))
+
+        self.assertFalse(result.changed)
+        self.assertIsNotNone(result.skip_reason)
+        self.assertEqual(result.overrun and result.overrun.nodes, 4)
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "wx.Color(0)\n")
+
+    def test_profiled(self) -> None:
+        options = RunOptions(formatter=[], max_nodes=3, profile=True)
+        result = run_file(ColorToColourCommand, self.path, options)
+
+        self.assertFalse(result.changed)
+        self.assertEqual(result.overrun and result.overrun.phase, "profiling")
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "wx.Color(0)\n")
+
+    def test_worker_killed(self) -> None:
+        start = time.monotonic()
+        results = list(
+            run_workers(
+                UninterruptibleCommand,
+                [[self.path]],
+                RunOptions(formatter=[], max_seconds=0.2),
+                None,
+                1,
+                WorkerLimits(),
+            )
+        )
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(results), 1)
+        self.assertIn("Worker killed", results[0].error or "")
+
+    def test_worker_killed_after_written_files(self) -> None:
+        stuck_path = os.path.join(self.tmp_dir.name, "stuck.py")
+
+        with open(stuck_path, "w") as f:
+            f.write("# stuck\n")
+
+        results = list(
+            run_workers(
+                UninterruptibleOnMarkerCommand,
+                [[self.path, stuck_path]],
+                RunOptions(formatter=[], max_seconds=0.2, io_threads=0),
+                None,
+                1,
+                WorkerLimits(),
+            )
+        )
+
+        # The file written before the worker got stuck isn't reported as failed
+        self.assertEqual(
+            [(result.path, result.changed, result.error is None) for result in results],
+            [(self.path, True, True), (stuck_path, False, False)],
+        )
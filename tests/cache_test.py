@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from codemods.cache import ResultCache, formatter_version, source_version
+from codemods.wxpython import ColorToColourCommand, SizerAddCommand
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(SizerAddCommand, directory=self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_miss(self) -> None:
+        self.assertIsNone(self.cache.get(b"sizer.AddWindow(panel)"))
+
+    def test_changed(self) -> None:
+        self.cache.put(b"sizer.AddWindow(panel)", b"sizer.Add(panel)")
+
+        self.assertEqual(self.cache.get(b"sizer.AddWindow(panel)"), (b"sizer.Add(panel)", []))
+
+    def test_warnings(self) -> None:
+        self.cache.put(b"sizer.AddWindow(panel)", b"sizer.AddWindow(panel)", ["Cannot fix."])
+
+        self.assertEqual(
+            self.cache.get(b"sizer.AddWindow(panel)"), (b"sizer.AddWindow(panel)", ["Cannot fix."])
+        )
+
+    def test_unchanged(self) -> None:
+        self.cache.put(b"sizer.Add(panel)", b"sizer.Add(panel)")
+
+        self.assertEqual(self.cache.get(b"sizer.Add(panel)"), (b"sizer.Add(panel)", []))
+
+    def test_key_depends_on_command(self) -> None:
+        other_cache = ResultCache(ColorToColourCommand, directory=self.tmp_dir.name)
+
+        self.cache.put(b"sizer.AddWindow(panel)", b"sizer.Add(panel)")
+
+        self.assertIsNone(other_cache.get(b"sizer.AddWindow(panel)"))
+
+    def test_key_depends_on_variant(self) -> None:
+        other_cache = ResultCache(SizerAddCommand, directory=self.tmp_dir.name, variant="black")
+
+        self.cache.put(b"sizer.AddWindow(panel)", b"sizer.Add(panel)")
+
+        self.assertIsNone(other_cache.get(b"sizer.AddWindow(panel)"))
+
+    def test_key_depends_on_context(self) -> None:
+        self.cache.put(b"from . import a", b"from . import b", context="package")
+
+        self.assertIsNone(self.cache.get(b"from . import a", "other_package"))
+        self.assertIsNotNone(self.cache.get(b"from . import a", "package"))
+
+    def test_formatter_version(self) -> None:
+        self.assertEqual(formatter_version(()), "")
+        self.assertEqual(formatter_version(("missing-formatter", "-")), "")
+        self.assertIn("black", formatter_version(("black", "-q", "-")))
+
+    def test_prune_least_recently_used(self) -> None:
+        self.cache.max_size = 2 * len(b"+[]\nsizer.Add(panel)")
+
+        for i, source in enumerate([b"a.AddWindow(p)", b"b.AddWindow(p)", b"c.AddWindow(p)"]):
+            self.cache.put(source, b"sizer.Add(panel)")
+            os.utime(self.cache.path(source), (i, i))
+
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get(b"a.AddWindow(p)"))
+        self.assertIsNotNone(self.cache.get(b"b.AddWindow(p)"))
+        self.assertIsNotNone(self.cache.get(b"c.AddWindow(p)"))
+
+    def test_source_version(self) -> None:
+        self.assertEqual(len(source_version()), 64)
@@ -0,0 +1,159 @@
+import io
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from unittest import TestCase, skipUnless
+
+from codemods.client import (
+    check_directory,
+    check_socket,
+    main,
+    request,
+    transform,
+)
+from codemods.daemon import Daemon
+from codemods.runner import RunOptions
+
+
+class DaemonTests(TestCase):
+    tmp_dir: tempfile.TemporaryDirectory
+    socket: str
+    daemon: Daemon
+    thread: threading.Thread
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.socket = os.path.join(cls.tmp_dir.name, "daemon.sock")
+        cls.daemon = Daemon(cls.socket, RunOptions(formatter=[]), jobs=1)
+        cls.thread = threading.Thread(target=cls.daemon.serve)
+        cls.thread.start()
+
+        while not os.path.exists(cls.socket):
+            cls.thread.join(0.01)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        request({"stop": True}, socket=cls.socket)
+        cls.thread.join()
+        cls.tmp_dir.cleanup()
+
+    def test_transform(self) -> None:
+        result, output = transform(
+            "wxpython.SizerAddCommand",
+            "module.py",
+            b"sizer.AddWindow(panel)\n",
+            socket=self.socket,
+        )
+
+        self.assertTrue(result["changed"])
+        self.assertIsNone(result["error"])
+        self.assertEqual(output, b"sizer.Add(panel)\n")
+
+    def test_unchanged(self) -> None:
+        result, output = transform(
+            "wxpython.SizerAddCommand", "module.py", b"sizer.Add(panel)\n", socket=self.socket
+        )
+
+        self.assertFalse(result["changed"])
+        self.assertEqual(output, b"sizer.Add(panel)\n")
+
+    def test_diff(self) -> None:
+        _, output = transform(
+            "wxpython.SizerAddCommand",
+            "module.py",
+            b"sizer.AddWindow(panel)\n",
+            diff=True,
+            socket=self.socket,
+        )
+
+        self.assertEqual(
+            output,
+            b"--- a/module.py\n+++ b/module.py\n@@ -1 +1 @@\n"
+            b"-sizer.AddWindow(panel)\n+sizer.Add(panel)\n",
+        )
+
+    def test_pipeline(self) -> None:
+        _, output = transform(
+            "wxpython.SizerAddCommand,wxpython.ColorToColourCommand",
+            "module.py",
+            b"sizer.AddWindow(wx.Color(0))\n",
+            socket=self.socket,
+        )
+
+        self.assertEqual(output, b"sizer.Add(wx.Colour(0))\n")
+
+    def test_failure(self) -> None:
+        result, _ = transform(
+            "wxpython.SizerAddCommand", "module.py", b"sizer.AddWindow(\n", socket=self.socket
+        )
+
+        self.assertIsNotNone(result["error"])
+
+    def test_unknown_command(self) -> None:
+        result, _ = transform("wxpython.UnknownCommand", "module.py", b"", socket=self.socket)
+
+        self.assertEqual(result["error"], "Unknown command wxpython.UnknownCommand.")
+
+    def test_client_in_place(self) -> None:
+        path = os.path.join(self.tmp_dir.name, "module.py")
+
+        with open(path, "w") as f:
+            f.write("sizer.AddWindow(panel)\n")
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(
+                main(["wxpython.SizerAddCommand", path, "-i", "--socket", self.socket]), 0
+            )
+
+        self.assertEqual(stdout.getvalue(), "")
+
+        with open(path) as f:
+            self.assertEqual(f.read(), "sizer.Add(panel)\n")
+
+    def test_client_not_running(self) -> None:
+        socket = os.path.join(self.tmp_dir.name, "missing.sock")
+
+        with tempfile.NamedTemporaryFile(suffix=".py") as f:
+            self.assertEqual(main(["wxpython.SizerAddCommand", f.name, "--socket", socket]), 2)
+
+
+class SocketPermissionsTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "daemon.sock")
+
+        with open(self.path, "w"):
+            pass
+
+        os.chmod(self.path, 0o600)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_user_only(self) -> None:
+        check_socket(self.path)
+
+    def test_socket_accessible_by_others(self) -> None:
+        os.chmod(self.path, 0o666)
+
+        with self.assertRaises(PermissionError):
+            request({"stop": True}, socket=self.path)
+
+    @skipUnless(os.getuid() == 0, "changing the owner of a file needs root")
+    def test_socket_of_another_user(self) -> None:
+        os.chown(self.path, 65534, -1)
+
+        with self.assertRaises(PermissionError):
+            check_socket(self.path)
+
+    def test_directory_writable_by_others(self) -> None:
+        os.chmod(self.tmp_dir.name, 0o777)
+
+        with self.assertRaises(PermissionError):
+            check_socket(self.path)
+
+        # Others cannot replace the user's files in sticky directories, i.e. /tmp
+        os.chmod(self.tmp_dir.name, 0o1777)
+        check_directory(self.tmp_dir.name)
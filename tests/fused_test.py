@@ -0,0 +1,37 @@
+import libcst as cst
+from libcst.codemod import CodemodTest, VisitorBasedCodemodCommand
+
+from codemods.fused import FusedCodemodCommand
+
+
+class RenameNameCommand(VisitorBasedCodemodCommand):
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        return updated_node.with_changes(value=f"{updated_node.value}_renamed")
+
+
+class SkipFunctionsCommand(VisitorBasedCodemodCommand):
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        return False
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        return updated_node.with_changes(value=updated_node.value.upper())
+
+
+class FusedCommand(FusedCodemodCommand):
+    COMMANDS = [RenameNameCommand, SkipFunctionsCommand]
+
+
+class FusedCodemodCommandTests(CodemodTest):
+    TRANSFORM = FusedCommand
+
+    def test_commands_applied_in_order(self) -> None:
+        before = "a = b"
+        after = "A_RENAMED = B_RENAMED"
+
+        self.assertCodemod(before, after)
+
+    def test_skip_children_only_for_command(self) -> None:
+        before = "def f(): a = b"
+        after = "def f_renamed(): a_renamed = b_renamed"
+
+        self.assertCodemod(before, after)
@@ -0,0 +1,149 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from codemods.index import UsageIndex, main, usage_symbol
+from codemods.paths import iter_files
+
+
+class UsageIndexTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.tmp_dir.name, "index.json")
+        self.src_dir = os.path.join(self.tmp_dir.name, "src")
+        os.mkdir(self.src_dir)
+
+        self.write("frame.py", "sizer.AddWindow(panel)\ncolour = wx.Color(0)\n")
+        self.write("dialog.py", "wx.FileDialog(style=wx.OPEN)\n")
+        self.write("migrated.py", "sizer.Add(panel)\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write(self, name: str, code: str) -> None:
+        with open(os.path.join(self.src_dir, name), "w") as f:
+            f.write(code)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.src_dir, name)
+
+    def update(self, *paths: str) -> int:
+        roots = [self.path(path) for path in paths] or [self.src_dir]
+        index = UsageIndex.load(self.index_path)
+        scanned, errors = index.update(iter_files(roots), jobs=1, roots=roots)
+        index.save()
+
+        self.assertEqual(errors, {})
+
+        return scanned
+
+    def test_update(self) -> None:
+        self.assertEqual(self.update(), 3)
+
+        index = UsageIndex.load(self.index_path)
+
+        self.assertEqual(
+            {
+                os.path.basename(file): [(u.line, u.command, u.symbol) for u in usages]
+                for file, usages in index.pending().items()
+            },
+            {
+                "frame.py": [
+                    (1, "wxpython.SizerAddCommand", "AddWindow"),
+                    (2, "wxpython.ColorToColourCommand", "Color"),
+                ],
+                "dialog.py": [(1, "wxpython.ConstantsRenameCommand", "OPEN")],
+            },
+        )
+        self.assertEqual(
+            list(index.pending("wxpython.SizerAddCommand")), [os.path.join("src", "frame.py")]
+        )
+
+    def test_incremental(self) -> None:
+        self.update()
+        self.write("frame.py", "sizer.Add(panel)\n")
+        os.remove(self.path("dialog.py"))
+
+        self.assertEqual(self.update(), 1)
+        self.assertEqual(UsageIndex.load(self.index_path).pending(), {})
+        self.assertEqual(self.update(), 0)
+
+    def test_update_some_paths(self) -> None:
+        os.mkdir(self.path("package"))
+        self.write(os.path.join("package", "panel.py"), "sizer.AddWindow(panel)\n")
+        self.update()
+        os.remove(self.path(os.path.join("package", "panel.py")))
+
+        # Files outside the paths are kept unless removed
+        self.assertEqual(self.update("frame.py", "package"), 0)
+        self.assertEqual(
+            sorted(UsageIndex.load(self.index_path).files),
+            [os.path.join("src", name) for name in ["dialog.py", "frame.py", "migrated.py"]],
+        )
+
+    def test_normalized_paths(self) -> None:
+        self.update()
+
+        index = UsageIndex.load(self.index_path)
+        path = os.path.join(self.src_dir, os.curdir, "frame.py")
+
+        self.assertEqual(index.update([(path, 0)], jobs=1), (0, {}))
+        self.assertEqual(len(index.files), 3)
+
+    def test_report(self) -> None:
+        self.update()
+        self.write("dialog.py", "wx.FileDialog(style=wx.FD_OPEN)\n")
+        self.update()
+
+        report = UsageIndex.load(self.index_path).report()
+
+        self.assertEqual((report.files, report.pending_files, report.usages), (3, 1, 2))
+        self.assertEqual(
+            set(report.commands), {"wxpython.SizerAddCommand", "wxpython.ColorToColourCommand"}
+        )
+        self.assertEqual(report.symbols, {"AddWindow": 1, "Color": 1})
+        self.assertEqual([snapshot.pending_files for snapshot in report.history], [2, 1])
+
+    def test_rebuilt_when_commands_change(self) -> None:
+        self.update()
+
+        with open(self.index_path) as f:
+            data = json.load(f)
+
+        data["version"] = "other"
+
+        with open(self.index_path, "w") as f:
+            json.dump(data, f)
+
+        index = UsageIndex.load(self.index_path)
+
+        self.assertEqual(index.files, {})
+        self.assertEqual(len(index.history), 1)
+
+    def test_main(self) -> None:
+        self.update()
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            main(
+                ["--index", self.index_path, "--no-update", "--files", "wxpython.SizerAddCommand"]
+            )
+
+        self.assertEqual(
+            output.getvalue(),
+            f"{os.path.join('src', 'frame.py')}:1:0: wxpython.SizerAddCommand: "
+            "sizer.AddWindow(panel)\n",
+        )
+
+
+class UsageSymbolTests(TestCase):
+    def test_usage_symbol(self) -> None:
+        self.assertEqual(
+            usage_symbol("wxpython.MenuAppendCommand", "menu.Append(1, help='')"), "Append"
+        )
+        self.assertEqual(
+            usage_symbol("wxpython.MakeModalCommand", "class Frame(wx.Frame):"), "MakeModal"
+        )
@@ -0,0 +1,146 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from unittest import TestCase
+
+from codemods.cli import main
+from codemods.journal import Journal, Progress
+from codemods.runner import FileResult
+
+
+class JournalTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmp_dir.name, "journal.jsonl")
+        self.paths = []
+
+        for name in ["a.py", "b.py", "c.py"]:
+            path = os.path.join(self.tmp_dir.name, name)
+            self.paths.append(path)
+
+            with open(path, "w") as f:
+                f.write("sizer.AddWindow(panel)\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_resume(self) -> None:
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        journal.record(FileResult(self.paths[0], changed=True, seconds=0.5))
+        journal.record(FileResult(self.paths[1], error="Failed."))
+        journal.close()
+
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        pending = list(journal.pending((path, 0) for path in self.paths))
+        journal.close()
+
+        self.assertEqual(pending, [(self.paths[1], 0), (self.paths[2], 0)])
+        self.assertEqual(journal.resumed, 1)
+        self.assertEqual(journal.entries[self.paths[0]].outcome, "changed")
+        self.assertEqual(journal.entries[self.paths[0]].seconds, 0.5)
+
+    def test_modified_since(self) -> None:
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        journal.record(FileResult(self.paths[0]))
+        journal.close()
+
+        with open(self.paths[0], "a") as f:
+            f.write("sizer.AddWindow(button)\n")
+
+        self.assertFalse(Journal(self.journal, "wxpython.SizerAddCommand").done(self.paths[0]))
+
+    def test_line_cut_short(self) -> None:
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        journal.record(FileResult(self.paths[0]))
+        journal.close()
+
+        with open(self.journal, "a") as f:
+            f.write('{"file": "')
+
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        journal.record(FileResult(self.paths[1]))
+        journal.close()
+
+        journal = Journal(self.journal, "wxpython.SizerAddCommand")
+        journal.close()
+
+        self.assertEqual(list(journal.entries), self.paths[:2])
+
+    def test_other_command(self) -> None:
+        Journal(self.journal, "wxpython.SizerAddCommand").close()
+
+        with self.assertRaisesRegex(ValueError, "journal of another command"):
+            Journal(self.journal, "wxpython.ColorToColourCommand")
+
+    def test_main(self) -> None:
+        argv = [
+            "wxpython.SizerAddCommand",
+            "--no-format",
+            "--no-cache",
+            "-j",
+            "1",
+            "--journal",
+            self.journal,
+            *self.paths,
+        ]
+
+        # A previous run killed after the first file
+        with open(self.journal, "w") as f:
+            f.write(json.dumps({"command": "wxpython.SizerAddCommand"}) + "\n")
+
+        with open(self.paths[0], "w") as f:
+            f.write("sizer.Add(panel)\n")
+
+        stat = os.stat(self.paths[0])
+
+        with open(self.journal, "a") as f:
+            entry = {
+                "file": self.paths[0],
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "outcome": "changed",
+                "seconds": 0.1,
+            }
+            f.write(json.dumps(entry) + "\n")
+
+        with redirect_stderr(io.StringIO()) as stderr:
+            self.assertEqual(main(argv), 0)
+
+        self.assertIn("Finished codemodding 2 files!", stderr.getvalue())
+        self.assertIn("Resumed after 1 files codemodded before.", stderr.getvalue())
+
+        with open(self.journal) as f:
+            outcomes = [json.loads(line).get("outcome") for line in f]
+
+        self.assertEqual(outcomes, [None, "changed", "changed", "changed"])
+
+    def test_main_other_command(self) -> None:
+        Journal(self.journal, "wxpython.ColorToColourCommand").close()
+
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["wxpython.SizerAddCommand", "--journal", self.journal, *self.paths])
+
+
+class ProgressTests(TestCase):
+    def test_progress(self) -> None:
+        stream = io.StringIO()
+        progress = Progress(files=4, size=4000, stream=stream)
+        progress.started -= 10
+
+        progress.add(1000)
+        progress.close()
+
+        self.assertEqual(stream.getvalue(), "\r1/4 files, 0.1 files/s, 100.0 B/s, ETA 0:00:30\n")
+
+    def test_clear(self) -> None:
+        stream = io.StringIO()
+        progress = Progress(files=2, size=0, stream=stream)
+        progress.started -= 1
+
+        progress.add(0)
+        progress.clear()
+
+        status = "1/2 files, 1.0 files/s, 0.0 B/s, ETA 0:00:01"
+        self.assertEqual(stream.getvalue(), f"\r{status}\r{' ' * len(status)}\r")
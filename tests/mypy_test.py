@@ -1,6 +1,12 @@
-from libcst.codemod import CodemodTest
+from unittest import TestCase
 
-from codemods.mypy import DefaultFunctionReturnTypeCommand
+import libcst as cst
+from libcst.codemod import CodemodContext, CodemodTest
+
+from codemods.mypy import (
+    DefaultFunctionReturnTypeCommand,
+    add_default_return_types,
+)
 
 
 class ColorToColourCommandTests(CodemodTest):
@@ -17,3 +23,53 @@ class ColorToColourCommandTests(CodemodTest):
         after = "def f() -> None: pass"
 
         self.assertCodemod(before, after)
+
+
+class AddDefaultReturnTypesTests(TestCase):
+    SOURCES = [
+        b"def f(): pass\n",
+        b"def f() -> int: pass\n",
+        b"async def f(a, b=1, *args, c: int = 2, **kwargs) :\n    return 1\n",
+        b"class A:\n    @property\n    def f(self):\n        def g(x=(1, [2], {3: 4})): pass\n",
+        b"def f(\n    a,  # first\n    b=')',  # second\n):\n    pass\n",
+        b"def f(a,\n      b) \\\n        :\n    pass\n",
+        b"def f(): pass\r\ndef g() -> None: pass\r\n",
+        b"def f(a=lambda x: x): pass",
+        b"# -*- coding: latin-1 -*-\ndef f(a='\xe9'): pass\n",
+        b"x = 'def f(): pass'\n",
+        b"",
+    ]
+
+    def transform(self, source: bytes) -> bytes:
+        command = DefaultFunctionReturnTypeCommand(CodemodContext())
+
+        return command.transform_module(cst.parse_module(source)).bytes
+
+    def test_same_output_as_command(self) -> None:
+        for source in self.SOURCES:
+            with self.subTest(source=source):
+                self.assertEqual(add_default_return_types(source), self.transform(source))
+
+    def test_unchanged_source(self) -> None:
+        source = b"x = 1\n"
+
+        self.assertIs(add_default_return_types(source), source)
+
+    def test_uncertain_sources(self) -> None:
+        for source in [
+            b"\xef\xbb\xbfdef f(): pass\n",
+            b"def f(): pass\rdef g(): pass\n",
+            b"def f(:\n",
+            b"def f[T](x: T): pass\n",
+        ]:
+            with self.subTest(source=source):
+                self.assertIsNone(add_default_return_types(source))
+
+    def test_python_2_source(self) -> None:
+        # Tokenizes but isn't parsed by LibCST, the file must be left untouched
+        source = b"# -*- coding: utf-8 -*-\nprint u'\xc3\xa9'\n\ndef f(): pass\n"
+
+        self.assertIsNone(add_default_return_types(source))
+
+        with self.assertRaises(cst.ParserSyntaxError):
+            cst.parse_module(source)
@@ -0,0 +1,99 @@
+import io
+import os
+import stat
+import subprocess
+import tempfile
+from unittest import TestCase
+
+from codemods.paths import changed_paths, read_paths, write_file
+
+
+class ReadPathsTests(TestCase):
+    def test_newline_separated(self) -> None:
+        stream = io.BytesIO(b"a.py\nb c.py\n\nd.py")
+
+        self.assertEqual(list(read_paths(stream)), ["a.py", "b c.py", "d.py"])
+
+    def test_nul_separated(self) -> None:
+        stream = io.BytesIO(b"a.py\0b\nc.py\0")
+
+        self.assertEqual(list(read_paths(stream, b"\0")), ["a.py", "b\nc.py"])
+
+
+class ChangedPathsTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+        self.git("init", "-q")
+        self.write("unchanged.py")
+        self.write("modified.py")
+        self.write("deleted.py")
+        self.git("add", ".")
+        self.git("-c", "user.name=test", "-c", "user.email=test@test", "commit", "-qm", "base")
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def git(self, *args: str) -> None:
+        subprocess.check_call(["git", *args])
+
+    def write(self, path: str, code: str = "pass\n") -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with open(path, "a") as f:
+            f.write(code)
+
+    def test_changed_paths(self) -> None:
+        self.write("modified.py")
+        self.write("staged.py")
+        self.write("package/untracked.py")
+        self.write("notes.txt")
+        self.git("add", "staged.py", "notes.txt")
+        os.remove("deleted.py")
+
+        self.assertEqual(sorted(changed_paths("HEAD")), ["modified.py", "staged.py"])
+
+    def test_staged_only(self) -> None:
+        self.write("staged.py")
+        self.git("add", "staged.py")
+        os.remove("staged.py")
+
+        self.assertEqual(list(changed_paths("HEAD")), ["staged.py"])
+
+    def test_paths(self) -> None:
+        self.write("modified.py")
+        self.write("package/added.py")
+        self.git("add", "package")
+
+        self.assertEqual(list(changed_paths("HEAD", ["package"])), ["package/added.py"])
+
+
+class WriteFileTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "module.py")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_file(self) -> None:
+        link = os.path.join(self.tmp_dir.name, "link.py")
+
+        with open(self.path, "wb") as f:
+            f.write(b"a = 1\n")
+
+        os.chmod(self.path, 0o751)
+        os.symlink(self.path, link)
+
+        write_file(link, b"a = 2\n")
+
+        self.assertTrue(os.path.islink(link))
+
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"a = 2\n")
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o751)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["link.py", "module.py"])
@@ -0,0 +1,95 @@
+import textwrap
+from typing import List
+from unittest import TestCase
+
+import libcst as cst
+from libcst.codemod import (
+    CodemodContext,
+    CodemodTest,
+    VisitorBasedCodemodCommand,
+)
+from libcst.metadata import MetadataWrapper, PositionProvider
+
+from codemods.mypy import DefaultFunctionReturnTypeCommand
+from codemods.pipeline import PipelineCodemodCommand, pipeline
+from codemods.prefilter import load_command
+from codemods.wxpython import (
+    ColorToColourCommand,
+    DeprecationWarningsCommand,
+    MakeModalCommand,
+    WxPythonMigrationCommand,
+)
+
+WRAPPERS: List[MetadataWrapper] = []
+
+
+class PositionsCommand(VisitorBasedCodemodCommand):
+    # Records the metadata wrapper used to resolve the positions
+    METADATA_DEPENDENCIES = (PositionProvider,)
+
+    def visit_Module(self, node: cst.Module) -> None:
+        self.get_metadata(PositionProvider, node)
+
+        assert self.context.wrapper is not None
+        WRAPPERS.append(self.context.wrapper)
+
+
+class MigrationPipeline(PipelineCodemodCommand):
+    COMMANDS = [DefaultFunctionReturnTypeCommand, WxPythonMigrationCommand]
+
+
+class PipelineCodemodCommandTests(CodemodTest):
+    TRANSFORM = MigrationPipeline
+
+    def test_same_as_commands_one_after_another(self) -> None:
+        before = textwrap.dedent(
+            """
+            from wx import BitmapFromImage
+
+            class MyModal(wx.Frame):
+                def show(self, image):
+                    self.MakeModal()
+                    return BitmapFromImage(image), wx.Color(0)
+            """
+        )
+        after = before
+
+        for command in [DefaultFunctionReturnTypeCommand, WxPythonMigrationCommand]:
+            after = command(CodemodContext()).transform_module(cst.parse_module(after)).code
+
+        self.assertCodemod(before, after)
+
+    def test_metadata_shared_while_unchanged(self) -> None:
+        WRAPPERS.clear()
+
+        pipeline((PositionsCommand, ColorToColourCommand, PositionsCommand))(
+            CodemodContext()
+        ).transform_module(cst.parse_module("wx.Colour(0)\n"))
+
+        self.assertEqual(len(WRAPPERS), 2)
+        self.assertIs(WRAPPERS[0], WRAPPERS[1])
+
+    def test_metadata_resolved_again_when_changed(self) -> None:
+        WRAPPERS.clear()
+
+        pipeline((PositionsCommand, ColorToColourCommand, PositionsCommand))(
+            CodemodContext()
+        ).transform_module(cst.parse_module("wx.Color(0)\n"))
+
+        self.assertEqual(len(WRAPPERS), 2)
+        self.assertIsNot(WRAPPERS[0], WRAPPERS[1])
+
+
+class PipelineTests(TestCase):
+    def test_pipeline(self) -> None:
+        command = pipeline((MakeModalCommand, DeprecationWarningsCommand))
+
+        self.assertTrue(issubclass(command, PipelineCodemodCommand))
+        self.assertEqual(command.COMMANDS, [MakeModalCommand, DeprecationWarningsCommand])
+        self.assertIs(pipeline((MakeModalCommand, DeprecationWarningsCommand)), command)
+
+    def test_load_command(self) -> None:
+        self.assertIs(
+            load_command("wxpython.MakeModalCommand,wxpython.DeprecationWarningsCommand"),
+            pipeline((MakeModalCommand, DeprecationWarningsCommand)),
+        )
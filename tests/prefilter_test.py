@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+from codemods.mypy import DefaultFunctionReturnTypeCommand
+from codemods.prefilter import (
+    command_name,
+    load_command,
+    may_match,
+    trigger_tokens,
+)
+from codemods.wxpython import (
+    ConstantsRenameCommand,
+    MakeModalCommand,
+    MenuAppendCommand,
+    SizerAddCommand,
+    WxPythonMigrationCommand,
+)
+
+
+class TriggerTokensTests(TestCase):
+    def test_tokens_from_call_matcher(self) -> None:
+        self.assertEqual(trigger_tokens(SizerAddCommand), {"AddWindow"})
+
+    def test_tokens_from_matchers_map(self) -> None:
+        self.assertEqual(
+            trigger_tokens(ConstantsRenameCommand),
+            {
+                "WXK_PRIOR",
+                "WXK_NEXT",
+                "WXK_NUMPAD_PRIOR",
+                "WXK_NUMPAD_NEXT",
+                "OPEN",
+                "FILE_MUST_EXIST",
+                "TE_LINEWRAP",
+            },
+        )
+
+    def test_tokens_contained_in_other_tokens_are_dropped(self) -> None:
+        self.assertEqual(trigger_tokens(MenuAppendCommand), {"Append"})
+
+    def test_tokens_only_from_hooked_nodes(self) -> None:
+        self.assertEqual(trigger_tokens(MakeModalCommand), {"MakeModal"})
+
+    def test_tokens_from_node_keyword(self) -> None:
+        self.assertEqual(trigger_tokens(DefaultFunctionReturnTypeCommand), {"def"})
+
+    def test_tokens_of_fused_command(self) -> None:
+        tokens = trigger_tokens(WxPythonMigrationCommand)
+
+        assert tokens is not None
+        self.assertTrue({"AddWindow", "MakeModal", "DoAddTool", "InsertColumnInfo"} <= tokens)
+
+
+class MayMatchTests(TestCase):
+    def test_match(self) -> None:
+        self.assertTrue(may_match(SizerAddCommand, b"sizer.AddWindow(panel)"))
+
+    def test_no_match(self) -> None:
+        self.assertFalse(may_match(SizerAddCommand, b"sizer.Add(panel)"))
+
+
+class LoadCommandTests(TestCase):
+    def test_load_command(self) -> None:
+        self.assertIs(load_command("wxpython.SizerAddCommand"), SizerAddCommand)
+
+    def test_command_name(self) -> None:
+        self.assertEqual(command_name(SizerAddCommand), "wxpython.SizerAddCommand")
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from libcst.codemod import CodemodContext
+
+from codemods.pipeline import pipeline
+from codemods.profiling import ProfileSummary, profile_source
+from codemods.wxpython import (
+    ColorToColourCommand,
+    SizerAddCommand,
+    WxPythonMigrationCommand,
+)
+
+
+class ProfileSourceTests(TestCase):
+    def test_profile(self) -> None:
+        source = b"wx.Color(255)\nwx.Colour(255)\n"
+
+        output, profile = profile_source(
+            ColorToColourCommand, source, CodemodContext(filename="module.py")
+        )
+
+        self.assertEqual(output, b"wx.Colour(255)\nwx.Colour(255)\n")
+        self.assertEqual(profile.file, "module.py")
+        self.assertEqual(profile.command, "wxpython.ColorToColourCommand")
+        self.assertEqual(profile.changes, 1)
+        self.assertGreater(profile.nodes, 0)
+        self.assertEqual(profile.matches_calls, 2)
+        self.assertEqual(profile.hooks["wxpython.ColorToColourCommand.leave_Attribute"][0], 2)
+        self.assertGreater(profile.total, 0)
+
+    def test_fused_command(self) -> None:
+        source = b"wx.Color(sizer.AddWindow(panel))\n"
+
+        output, profile = profile_source(WxPythonMigrationCommand, source, CodemodContext())
+
+        self.assertEqual(output, b"wx.Colour(sizer.Add(panel))\n")
+        self.assertEqual(profile.changes, 2)
+        self.assertIn("wxpython.SizerAddCommand.leave_Call", profile.hooks)
+        self.assertIn("wxpython.ColorToColourCommand.leave_Attribute", profile.hooks)
+
+    def test_pipeline(self) -> None:
+        source = b"wx.Color(sizer.AddWindow(panel))\n"
+        command = pipeline((SizerAddCommand, ColorToColourCommand))
+
+        output, profile = profile_source(command, source, CodemodContext())
+
+        self.assertEqual(output, b"wx.Colour(sizer.Add(panel))\n")
+        self.assertEqual(profile.changes, 2)
+        self.assertGreater(profile.nodes, 0)
+        self.assertEqual(profile.hooks["wxpython.SizerAddCommand.leave_Call"][0], 2)
+        self.assertIn("wxpython.ColorToColourCommand.leave_Attribute", profile.hooks)
+
+
+class ProfileSummaryTests(TestCase):
+    def test_add(self) -> None:
+        summary = ProfileSummary()
+
+        for path in ("a.py", "b.py", "c.py"):
+            _, profile = profile_source(
+                SizerAddCommand, b"sizer.AddWindow(panel)\n", CodemodContext(filename=path)
+            )
+            summary.add(profile, slowest=2)
+
+        self.assertEqual(summary.files, 3)
+        self.assertEqual(summary.changes, 3)
+        self.assertEqual(summary.hooks["wxpython.SizerAddCommand.leave_Call"][0], 3)
+        self.assertEqual(len(summary.slowest), 2)
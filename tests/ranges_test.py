@@ -0,0 +1,270 @@
+import os
+import tempfile
+import textwrap
+from typing import List
+from unittest import TestCase
+
+import libcst as cst
+from libcst.codemod import CodemodContext, VisitorBasedCodemodCommand
+
+from codemods.cli import main
+from codemods.mypy import DefaultFunctionReturnTypeCommand
+from codemods.pipeline import pipeline
+from codemods.ranges import (
+    LineRanges,
+    diff_ranges,
+    map_ranges,
+    merge_ranges,
+    parse_file_ranges,
+    parse_ranges,
+)
+from codemods.runner import RunOptions, run_file
+from codemods.wxpython import (
+    ColorToColourCommand,
+    FixImportFromAdvCommand,
+    SizerAddCommand,
+    WxPythonMigrationCommand,
+)
+
+SOURCE = textwrap.dedent(
+    """\
+    def first(sizer):
+        sizer.AddWindow(wx.Color(0))
+
+
+    def second(sizer):
+        sizer.AddWindow(wx.Color(0))
+    """
+)
+
+
+def replace_line(line: int, old: str, new: str) -> str:
+    lines = SOURCE.splitlines(keepends=True)
+    lines[line - 1] = lines[line - 1].replace(old, new)
+
+    return "".join(lines)
+
+
+class NamesCommand(VisitorBasedCodemodCommand):
+    # Records the visited names
+    def __init__(self, context: CodemodContext):
+        super().__init__(context)
+
+        self.names: List[str] = []
+
+    def visit_Name(self, node: cst.Name) -> None:
+        self.names.append(node.value)
+
+
+class ParseTests(TestCase):
+    def test_merge_ranges(self) -> None:
+        self.assertEqual(merge_ranges([(10, 12), (1, 2), (3, 4), (11, 20)]), [(1, 4), (10, 20)])
+
+    def test_parse_ranges(self) -> None:
+        self.assertEqual(parse_ranges("10-20, 35,21"), [(10, 21), (35, 35)])
+
+        with self.assertRaisesRegex(ValueError, "Invalid range of lines: a-2"):
+            parse_ranges("a-2")
+
+    def test_parse_file_ranges(self) -> None:
+        self.assertEqual(parse_file_ranges("src/a.py:1-2"), ("src/a.py", [(1, 2)]))
+
+        with self.assertRaises(ValueError):
+            parse_file_ranges("1-2")
+
+    def test_diff_ranges(self) -> None:
+        diff = textwrap.dedent(
+            """\
+            diff --git a/frame.py b/frame.py
+            --- a/frame.py
+            +++ b/frame.py
+            @@ -2 +2,2 @@ class Frame:
+            -    a = 1
+            +    a = 2
+            +    b = 3
+            @@ -10,2 +10,0 @@
+            -    c = 4
+            -    d = 5
+            @@ -20,3 +19,3 @@
+                 e = 6
+            -    f = 7
+            +    f = 8
+                 g = 9
+            --- a/removed.py
+            +++ /dev/null
+            @@ -1 +0,0 @@
+            -x = 1
+            --- /dev/null
+            +++ b/package/added.py
+            @@ -0,0 +1 @@
+            +y = 1
+            \\ No newline at end of file
+            """
+        ).encode()
+
+        self.assertEqual(
+            diff_ranges(diff),
+            {"frame.py": [(2, 3), (11, 11), (20, 20)], "package/added.py": [(1, 1)]},
+        )
+        self.assertEqual(list(diff_ranges(diff, strip=0)), ["b/frame.py", "b/package/added.py"])
+
+    def test_diff_ranges_without_newline_at_end(self) -> None:
+        diff = textwrap.dedent(
+            """\
+            --- a/frame.py
+            +++ b/frame.py
+            @@ -2 +2,3 @@
+            -old
+            \\ No newline at end of file
+            +new
+            +more
+            +last
+            \\ No newline at end of file
+            """
+        ).encode()
+
+        self.assertEqual(diff_ranges(diff), {"frame.py": [(2, 4)]})
+
+
+class LineRangesTests(TestCase):
+    def test_map_ranges(self) -> None:
+        old = ["a\n", "b\n", "c\n", "d\n", "e\n"]
+        new = ["import\n", "\n", "a\n", "b\n", "C\n", "x\n", "d\n", "e\n"]
+
+        self.assertEqual(map_ranges(LineRanges([(2, 2)]), old, new), [(4, 4)])
+        self.assertEqual(map_ranges(LineRanges([(3, 3)]), old, new), [(5, 6)])
+        self.assertEqual(map_ranges(LineRanges([(1, 5)]), old, new), [(3, 8)])
+        self.assertEqual(map_ranges(LineRanges([(1, 1), (5, 5)]), old, new), [(3, 3), (8, 8)])
+
+    def test_overlaps(self) -> None:
+        lines = LineRanges([(5, 10), (20, 20)])
+
+        self.assertTrue(lines.overlaps(1, 5))
+        self.assertTrue(lines.overlaps(10, 30))
+        self.assertTrue(lines.overlaps(15, 25))
+        self.assertFalse(lines.overlaps(11, 19))
+        self.assertFalse(lines.overlaps(1, 4))
+        self.assertTrue(20 in lines)
+        self.assertFalse(21 in lines)
+
+    def transform(self, command: VisitorBasedCodemodCommand, *ranges: int) -> str:
+        LineRanges([(line, line) for line in ranges]).limit(command)
+
+        return command.transform_module(cst.parse_module(SOURCE)).code
+
+    def test_limit(self) -> None:
+        code = self.transform(DefaultFunctionReturnTypeCommand(CodemodContext()), 5)
+
+        self.assertEqual(code, replace_line(5, "(sizer)", "(sizer) -> None"))
+
+    def test_body_line_only(self) -> None:
+        # The functions' headers aren't changed for an edit of their body
+        code = self.transform(DefaultFunctionReturnTypeCommand(CodemodContext()), 6)
+
+        self.assertEqual(code, SOURCE)
+
+    def test_compound_statement_body(self) -> None:
+        code = self.transform(SizerAddCommand(CodemodContext()), 6)
+
+        self.assertEqual(code, replace_line(6, "AddWindow", "Add"))
+
+    def test_pruned(self) -> None:
+        command = NamesCommand(CodemodContext())
+        self.transform(command, 2)
+
+        self.assertEqual(command.names, ["sizer", "AddWindow", "wx", "Color"])
+
+    def test_fused(self) -> None:
+        code = self.transform(WxPythonMigrationCommand(CodemodContext()), 2)
+
+        self.assertEqual(code, replace_line(2, "AddWindow(wx.Color(0))", "Add(wx.Colour(0))"))
+
+    def test_pipeline(self) -> None:
+        command = pipeline((SizerAddCommand, ColorToColourCommand))(CodemodContext())
+        code = self.transform(command, 6)
+
+        self.assertEqual(code, replace_line(6, "AddWindow(wx.Color(0))", "Add(wx.Colour(0))"))
+
+    def test_pipeline_with_lines_added(self) -> None:
+        # The import added by the first command moves the functions down
+        source = "import wx\nx = wx.DatePickerCtrl\ndef f(a):\n    pass\ndef g(a):\n    pass\n"
+        command = pipeline((FixImportFromAdvCommand, DefaultFunctionReturnTypeCommand))(
+            CodemodContext()
+        )
+        LineRanges([(2, 2), (5, 5)]).limit(command)
+
+        self.assertEqual(
+            command.transform_module(cst.parse_module(source)).code,
+            textwrap.dedent(
+                """\
+                import wx
+                import wx.adv
+
+                x = wx.adv.DatePickerCtrl
+                def f(a):
+                    pass
+                def g(a) -> None:
+                    pass
+                """
+            ),
+        )
+
+
+class RunTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "frame.py")
+
+        with open(self.path, "w") as f:
+            f.write(SOURCE)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    def test_run_file(self) -> None:
+        options = RunOptions(formatter=[], line_ranges={os.path.abspath(self.path): [(1, 1)]})
+
+        result = run_file(DefaultFunctionReturnTypeCommand, self.path, options)
+
+        self.assertTrue(result.changed)
+        self.assertEqual(self.read(), replace_line(1, "(sizer)", "(sizer) -> None"))
+
+    def test_profiled(self) -> None:
+        options = RunOptions(
+            formatter=[], profile=True, line_ranges={os.path.abspath(self.path): [(5, 5)]}
+        )
+
+        result = run_file(DefaultFunctionReturnTypeCommand, self.path, options)
+
+        self.assertIsNotNone(result.profile)
+        self.assertEqual(self.read(), replace_line(5, "(sizer)", "(sizer) -> None"))
+
+    def test_file_without_lines(self) -> None:
+        options = RunOptions(formatter=[], line_ranges={})
+
+        result = run_file(DefaultFunctionReturnTypeCommand, self.path, options)
+
+        self.assertFalse(result.changed)
+        self.assertEqual(self.read(), SOURCE)
+
+    def test_main(self) -> None:
+        self.assertEqual(
+            main(
+                [
+                    "wxpython.SizerAddCommand",
+                    "--no-format",
+                    "--no-cache",
+                    "-j",
+                    "1",
+                    "--lines",
+                    f"{self.path}:5-6",
+                ]
+            ),
+            0,
+        )
+
+        self.assertEqual(self.read(), replace_line(6, "AddWindow", "Add"))
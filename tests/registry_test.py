@@ -0,0 +1,110 @@
+import inspect
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from libcst.codemod import VisitorBasedCodemodCommand
+
+from codemods import mypy, prefilter, registry, wxpython
+from codemods.cli import main
+
+
+class RegistryTests(TestCase):
+    def test_all_commands_registered(self) -> None:
+        names = {
+            f"{module.__name__.split('.')[-1]}.{name}"
+            for module in [mypy, wxpython]
+            for name, value in vars(module).items()
+            if inspect.isclass(value)
+            and issubclass(value, VisitorBasedCodemodCommand)
+            and value.__module__ == module.__name__
+            and not inspect.isabstract(value)
+        }
+
+        self.assertEqual(names, set(registry.COMMANDS))
+
+    def test_in_sync_with_commands(self) -> None:
+        for name, info in registry.COMMANDS.items():
+            with self.subTest(name):
+                command = prefilter.load_command(name)
+
+                self.assertEqual(info.description, command.DESCRIPTION)
+                self.assertEqual(registry.trigger_tokens(name), prefilter.trigger_tokens(command))
+                self.assertEqual(
+                    list(info.commands),
+                    [prefilter.command_name(c) for c in getattr(command, "COMMANDS", [])],
+                )
+
+    def test_pipeline(self) -> None:
+        name = "wxpython.SizerAddCommand,wxpython.MakeModalCommand"
+
+        self.assertTrue(registry.is_registered(name))
+        self.assertFalse(registry.is_registered("wxpython.SizerAddCommand,wxpython.Unknown"))
+        self.assertEqual(
+            registry.trigger_tokens(name),
+            prefilter.trigger_tokens(prefilter.load_command(name)),
+        )
+
+    def test_may_match(self) -> None:
+        self.assertTrue(registry.may_match("wxpython.SizerAddCommand", b"s.AddWindow(w)"))
+        self.assertFalse(registry.may_match("wxpython.SizerAddCommand", b"s.Add(w)"))
+
+    def test_libcst_not_imported(self) -> None:
+        with tempfile.NamedTemporaryFile("w", suffix=".py") as f:
+            f.write("sizer.Add(panel)\n")
+            f.flush()
+
+            code = (
+                "import sys\n"
+                "from codemods import cli, registry\n"
+                "registry.print_commands()\n"
+                f"cli.main(['wxpython.SizerAddCommand', {f.name!r}])\n"
+                "print(sorted(m for m in sys.modules if m.startswith(('libcst', 'codemods'))))\n"
+            )
+            output = subprocess.check_output(
+                [sys.executable, "-c", code],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+
+        self.assertIn("wxpython.SizerAddCommand", output)
+        self.assertTrue(
+            output.endswith(
+                "['codemods', 'codemods.cache', 'codemods.cli', 'codemods.journal', "
+                "'codemods.paths', 'codemods.registry']\n"
+            )
+        )
+
+
+class CliTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "frame.py")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def run_main(self, code: str) -> str:
+        with open(self.path, "w") as f:
+            f.write(code)
+
+        self.assertEqual(
+            main(["wxpython.SizerAddCommand", "--no-format", "--no-cache", "-j", "1", self.path]),
+            0,
+        )
+
+        with open(self.path) as f:
+            return f.read()
+
+    def test_unchanged(self) -> None:
+        self.assertEqual(self.run_main("sizer.Add(panel)\n"), "sizer.Add(panel)\n")
+
+    def test_changed(self) -> None:
+        self.assertEqual(self.run_main("sizer.AddWindow(panel)\n"), "sizer.Add(panel)\n")
+
+    def test_unknown_command(self) -> None:
+        with self.assertRaises(SystemExit):
+            main(["wxpython.UnknownCommand", self.tmp_dir.name])
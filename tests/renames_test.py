@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import textwrap
+from unittest import TestCase
+
+import libcst as cst
+from libcst.codemod import CodemodTest
+
+from codemods.prefilter import trigger_tokens
+from codemods.renames import (
+    RenameCommand,
+    RenameTable,
+    load_renames,
+    rename_keywords,
+)
+
+
+class RenameTableTests(TestCase):
+    def test_compile(self) -> None:
+        table = RenameTable.compile(
+            {
+                "symbols": {"wx.OPEN": "wx.FD_OPEN"},
+                "calls": {"wx.EmptyIcon": "wx.Icon"},
+                "methods": {"AddWindow": "Add"},
+                "keywords": {"Append": {"help": "helpString"}},
+                "imports": ["wx.adv"],
+            }
+        )
+
+        self.assertEqual(set(table.symbols), {"OPEN"})
+        self.assertEqual(set(table.calls["EmptyIcon"]), {"wx.EmptyIcon"})
+        self.assertEqual(table.methods["AddWindow"].value, "Add")
+        self.assertEqual(table.keywords["Append"]["help"].value, "helpString")
+        self.assertEqual(table.modules, {"wx"})
+        self.assertEqual(table.tokens, {"OPEN", "EmptyIcon", "AddWindow", "Append"})
+
+    def test_unknown_renames(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Unknown renames: constants"):
+            RenameTable.compile({"constants": {}})
+
+    def test_load_renames(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "renames.json")
+
+            with open(path, "w") as f:
+                json.dump({"sizer": {"methods": {"AddWindow": "Add"}}}, f)
+
+            tables = load_renames(path)
+
+        self.assertEqual(list(tables), ["sizer"])
+        self.assertEqual(tables["sizer"].tokens, {"AddWindow"})
+
+
+class RenameKeywordsTests(TestCase):
+    def test_rename_keywords(self) -> None:
+        call = cst.ensure_type(cst.parse_expression("f(a, b=1, c=2, d=3)"), cst.Call)
+
+        renamed = rename_keywords(call, {"b": cst.Name(value="x"), "d": cst.Name(value="y")})
+
+        self.assertEqual(cst.Module(body=[]).code_for_node(renamed), "f(a, x=1, c=2, y=3)")
+
+    def test_nothing_renamed(self) -> None:
+        call = cst.ensure_type(cst.parse_expression("f(a, b=1)"), cst.Call)
+
+        self.assertIs(rename_keywords(call, {"c": cst.Name(value="x")}), call)
+
+
+class ExampleRenameCommand(RenameCommand):
+    RENAMES = RenameTable.compile(
+        {
+            "symbols": {"os.getcwdu": "os.getcwd", "string.letters": "ascii_letters"},
+            "calls": {"os.path.exists": "os.path.lexists"},
+            "methods": {"has_key": "__contains__"},
+            "keywords": {"sort": {"cmp": "key"}},
+        }
+    )
+
+
+class RenameCommandTests(CodemodTest):
+    TRANSFORM = ExampleRenameCommand
+
+    def test_trigger_tokens(self) -> None:
+        self.assertEqual(
+            trigger_tokens(ExampleRenameCommand),
+            {"getcwdu", "letters", "exists", "has_key", "sort"},
+        )
+
+    def test_symbols(self) -> None:
+        before = "os.getcwdu(string.letters)"
+        after = "os.getcwd(ascii_letters)"
+
+        self.assertCodemod(before, after)
+
+    def test_calls(self) -> None:
+        before = "os.path.exists(path)\nf = os.path.exists\n"
+        after = "os.path.lexists(path)\nf = os.path.exists\n"
+
+        self.assertCodemod(before, after)
+
+    def test_no_op_call_or_subscript_in_name(self) -> None:
+        before = (
+            "os().getcwdu\nos['x'].getcwdu\nos(a=f()).path.exists(path)\nos[0].path.exists()\n"
+        )
+
+        self.assertCodemod(before, before)
+
+    def test_imported_calls(self) -> None:
+        before = textwrap.dedent(
+            """
+            from os.path import exists
+
+            exists(path)
+            """
+        )
+        after = textwrap.dedent(
+            """
+            import os.path
+
+            os.path.lexists(path)
+            """
+        )
+
+        self.assertCodemod(before, after)
+
+    def test_star_imported_calls(self) -> None:
+        before = textwrap.dedent(
+            """
+            from os.path import exists
+            from os.path import *
+
+            exists(path)
+            """
+        )
+
+        self.assertCodemod(before, before)
+
+    def test_methods(self) -> None:
+        before = "d.has_key(key)"
+        after = "d.__contains__(key)"
+
+        self.assertCodemod(before, after)
+
+    def test_keywords(self) -> None:
+        before = "values.sort(cmp=compare, reverse=True)\nsort(cmp=compare)\n"
+        after = "values.sort(key=compare, reverse=True)\nsort(cmp=compare)\n"
+
+        self.assertCodemod(before, after)
@@ -0,0 +1,389 @@
+import os
+import tempfile
+from typing import List, Optional, Sequence
+from unittest import TestCase, mock
+
+import libcst as cst
+from libcst.codemod import VisitorBasedCodemodCommand
+
+from codemods.cache import ResultCache
+from codemods.paths import iter_files
+from codemods.runner import (
+    FileResult,
+    PatchOutput,
+    RunOptions,
+    WorkerLimits,
+    run,
+    run_chunk,
+    run_file,
+    run_workers,
+    schedule,
+    write_diff,
+)
+from codemods.wxpython import SizerAddCommand
+
+
+class PidCommand(VisitorBasedCodemodCommand):
+    # Writes the id of the process running the command into the module
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        return updated_node.with_changes(
+            footer=[cst.EmptyLine(comment=cst.Comment(f"# {os.getpid()}"))]
+        )
+
+
+class WarnCommand(VisitorBasedCodemodCommand):
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        self.warn(f"Module of package {self.context.full_package_name}")
+
+        return updated_node
+
+
+class ExitCommand(VisitorBasedCodemodCommand):
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        os._exit(3)
+
+
+# Patch whose lock LockAndExitCommand leaves acquired, inherited by the workers
+LOCKED_PATCH: Optional[PatchOutput] = None
+
+
+class LockAndExitCommand(SizerAddCommand):
+    # Dies while writing the diff of a.py
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        if LOCKED_PATCH is not None and (self.context.filename or "").endswith("a.py"):
+            LOCKED_PATCH.lock.acquire()
+            os._exit(3)
+
+        return updated_node
+
+
+class RunFileTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "module.py")
+        self.options = RunOptions(formatter=[])
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write(self, code: bytes) -> None:
+        with open(self.path, "wb") as f:
+            f.write(code)
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_changed(self) -> None:
+        self.write(b"sizer.AddWindow(panel)\n")
+
+        result = run_file(SizerAddCommand, self.path, self.options)
+
+        self.assertTrue(result.changed)
+        self.assertEqual(self.read(), b"sizer.Add(panel)\n")
+
+    def test_unchanged(self) -> None:
+        self.write(b"sizer.Add(panel)\n")
+        os.utime(self.path, (0, 0))
+
+        result = run_file(SizerAddCommand, self.path, self.options)
+
+        self.assertFalse(result.changed)
+        self.assertEqual(self.read(), b"sizer.Add(panel)\n")
+        self.assertEqual(os.stat(self.path).st_mtime, 0)
+
+    def test_diff(self) -> None:
+        self.write(b"sizer.AddWindow(panel)\nsizer.Add(panel)")
+
+        result = run_file(SizerAddCommand, self.path, RunOptions(formatter=[], diff=True))
+
+        self.assertTrue(result.changed)
+        self.assertEqual(self.read(), b"sizer.AddWindow(panel)\nsizer.Add(panel)")
+        self.assertEqual(
+            result.diff,
+            b"--- a/%(path)s\n"
+            b"+++ b/%(path)s\n"
+            b"@@ -1,2 +1,2 @@\n"
+            b"-sizer.AddWindow(panel)\n"
+            b"+sizer.Add(panel)\n"
+            b" sizer.Add(panel)\n"
+            b"\\ No newline at end of file\n" % {b"path": os.fsencode(os.path.relpath(self.path))},
+        )
+
+    def test_scan(self) -> None:
+        self.write(b"sizer.AddWindow(panel)\n")
+
+        result = run_file(SizerAddCommand, self.path, RunOptions(formatter=[], scan=True))
+
+        self.assertFalse(result.changed)
+        self.assertEqual([match.new for match in result.matches], ["sizer.Add(panel)"])
+        self.assertEqual(self.read(), b"sizer.AddWindow(panel)\n")
+
+    def test_skip_generated(self) -> None:
+        self.write(b"# @gen" + b"erated\nsizer.AddWindow(panel)\n")
+
+        result = run_file(SizerAddCommand, self.path, self.options)
+
+        self.assertEqual(result.skip_reason, "Generated file.")
+
+    def test_failure(self) -> None:
+        self.write(b"sizer.AddWindow(\n")
+
+        result = run_file(SizerAddCommand, self.path, self.options)
+
+        self.assertIsNotNone(result.error)
+
+    def test_cached(self) -> None:
+        cache = ResultCache(SizerAddCommand, directory=os.path.join(self.tmp_dir.name, "cache"))
+
+        self.write(b"sizer.AddWindow(panel)\n")
+        list(run(SizerAddCommand, iter_files([self.path]), self.options, cache=cache, jobs=1))
+        self.write(b"sizer.AddWindow(panel)\n")
+
+        result = run_file(SizerAddCommand, self.path, self.options, cache=cache)
+
+        self.assertTrue(result.cached)
+        self.assertEqual(self.read(), b"sizer.Add(panel)\n")
+
+    def test_cached_warnings(self) -> None:
+        cache = ResultCache(WarnCommand, directory=os.path.join(self.tmp_dir.name, "cache"))
+        options = RunOptions(formatter=[], repo_root=self.tmp_dir.name)
+        self.write(b"x = 1\n")
+
+        run_file(WarnCommand, self.path, options, cache=cache)
+        result = run_file(WarnCommand, self.path, options, cache=cache)
+
+        self.assertTrue(result.cached)
+        self.assertEqual(result.warnings, ["Module of package "])
+
+        # Same source in another package
+        os.makedirs(os.path.join(self.tmp_dir.name, "package"))
+        path = os.path.join(self.tmp_dir.name, "package", "module.py")
+
+        with open(path, "wb") as f:
+            f.write(b"x = 1\n")
+
+        result = run_file(WarnCommand, path, options, cache=cache)
+
+        self.assertFalse(result.cached)
+        self.assertEqual(result.warnings, ["Module of package package"])
+
+
+class RunChunkTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmp_dir.name, f"{i}.py") for i in range(20)]
+
+        for i, path in enumerate(self.paths):
+            with open(path, "w") as f:
+                f.write("sizer.AddWindow(panel)\n" if i % 3 else "sizer.Add(panel)\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read(self) -> List[str]:
+        contents = []
+
+        for path in self.paths:
+            with open(path) as f:
+                contents.append(f.read())
+
+        return contents
+
+    def test_same_as_sequential(self) -> None:
+        results = run_chunk(SizerAddCommand, self.paths, RunOptions(formatter=[], io_threads=2))
+
+        self.assertEqual([result.path for result in results], self.paths)
+        self.assertEqual([result.changed for result in results], [bool(i % 3) for i in range(20)])
+        self.assertEqual(self.read(), ["sizer.Add(panel)\n"] * 20)
+
+    def test_read_error(self) -> None:
+        os.remove(self.paths[1])
+
+        results = run_chunk(SizerAddCommand, self.paths, RunOptions(formatter=[], io_threads=2))
+
+        self.assertEqual(len(results), 20)
+        self.assertIn("FileNotFoundError", results[1].error or "")
+        self.assertIsNone(results[2].error)
+
+    def test_write_error(self) -> None:
+        with mock.patch("codemods.runner.write_file", side_effect=OSError("disk full")):
+            results = run_chunk(
+                SizerAddCommand, self.paths[3:6], RunOptions(formatter=[], io_threads=2)
+            )
+
+        self.assertEqual([result.changed for result in results], [False, False, False])
+        self.assertEqual(
+            ["disk full" in (result.error or "") for result in results], [False, True, True]
+        )
+
+
+class RunTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        os.makedirs(os.path.join(self.tmp_dir.name, "package"))
+
+        for name in ["a.py", "b.txt", os.path.join("package", "c.py")]:
+            with open(os.path.join(self.tmp_dir.name, name), "w") as f:
+                f.write("sizer.AddWindow(panel)\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_iter_files(self) -> None:
+        self.assertEqual(
+            sorted(iter_files([self.tmp_dir.name])),
+            [
+                (os.path.join(self.tmp_dir.name, "a.py"), 23),
+                (os.path.join(self.tmp_dir.name, "package", "c.py"), 23),
+            ],
+        )
+
+    def test_run_in_pool(self) -> None:
+        results = list(
+            run(
+                SizerAddCommand,
+                iter_files([self.tmp_dir.name]),
+                RunOptions(formatter=[]),
+                jobs=2,
+            )
+        )
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(result.changed for result in results))
+
+    def test_patch_written_by_workers(self) -> None:
+        with tempfile.TemporaryFile() as f:
+            results = list(
+                run(
+                    SizerAddCommand,
+                    iter_files([self.tmp_dir.name]),
+                    RunOptions(formatter=[], diff=True),
+                    jobs=2,
+                    limits=WorkerLimits(max_files=1),
+                    patch=PatchOutput(f.fileno()),
+                )
+            )
+
+            f.seek(0)
+            patch = f.read()
+
+        self.assertTrue(all(result.changed and result.diff is None for result in results))
+
+        for result in results:
+            name = os.fsencode(os.path.relpath(result.path))
+
+            self.assertIn(
+                b"--- a/%s\n+++ b/%s\n@@ -1 +1 @@\n-sizer.AddWindow(panel)\n+sizer.Add(panel)\n"
+                % (name, name),
+                patch,
+            )
+
+    def test_patch_lock_of_dead_worker(self) -> None:
+        global LOCKED_PATCH
+
+        chunks = [[path] for path, _ in sorted(iter_files([self.tmp_dir.name]))]
+
+        with tempfile.TemporaryFile() as f:
+            LOCKED_PATCH = PatchOutput(f.fileno())
+
+            try:
+                results = list(
+                    run_workers(
+                        LockAndExitCommand,
+                        chunks,
+                        RunOptions(formatter=[], diff=True),
+                        None,
+                        1,
+                        WorkerLimits(),
+                        patch=LOCKED_PATCH,
+                    )
+                )
+            finally:
+                LOCKED_PATCH = None
+
+            f.seek(0)
+            patch = f.read()
+
+        self.assertEqual(
+            [(result.changed, result.error) for result in results],
+            [(False, "Worker exited with code 3."), (True, None)],
+        )
+        self.assertIn(b"+sizer.Add(panel)\n", patch)
+
+    @mock.patch("codemods.runner.PATCH_LOCK_SECONDS", 0.1)
+    def test_patch_lock_timeout(self) -> None:
+        with tempfile.TemporaryFile() as f:
+            patch = PatchOutput(f.fileno())
+            patch.lock.acquire()
+
+            result = write_diff(FileResult("a.py", changed=True, diff=b"+a\n"), patch)
+
+        self.assertIsNone(result.diff)
+        self.assertIn("Timed out waiting for the lock of the patch.", result.error or "")
+
+    def run_pids(self, limits: WorkerLimits, isolated: Sequence[str] = ()) -> List[str]:
+        # Runs each file in its own chunk with a single worker at a time
+        chunks = [[path] for path, _ in sorted(iter_files([self.tmp_dir.name]))]
+        results = list(
+            run_workers(PidCommand, chunks, RunOptions(formatter=[]), None, 1, limits, isolated)
+        )
+
+        self.assertTrue(all(result.changed for result in results))
+
+        pids = []
+
+        for result in results:
+            with open(result.path) as f:
+                pids.append(f.read().splitlines()[-1])
+
+        return pids
+
+    def test_workers_reused(self) -> None:
+        self.assertEqual(len(set(self.run_pids(WorkerLimits()))), 1)
+
+    def test_workers_recycled_after_max_files(self) -> None:
+        self.assertEqual(len(set(self.run_pids(WorkerLimits(max_files=1)))), 2)
+
+    def test_workers_recycled_above_max_rss(self) -> None:
+        self.assertEqual(len(set(self.run_pids(WorkerLimits(max_rss=0)))), 2)
+
+    def test_workers_recycled_after_isolated_files(self) -> None:
+        isolated = [os.path.join(self.tmp_dir.name, "a.py")]
+
+        self.assertEqual(len(set(self.run_pids(WorkerLimits(), isolated))), 2)
+
+    def test_worker_exited(self) -> None:
+        results = list(
+            run(ExitCommand, iter_files([self.tmp_dir.name]), RunOptions(formatter=[]), jobs=2)
+        )
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual({result.error for result in results}, {"Worker exited with code 3."})
+
+
+class ScheduleTests(TestCase):
+    def test_largest_first(self) -> None:
+        files = [("small.py", 1), ("large.py", 100), ("medium.py", 10)]
+
+        self.assertEqual(
+            schedule(files, chunk_files=1), [["large.py"], ["medium.py"], ["small.py"]]
+        )
+
+    def test_chunks_by_files(self) -> None:
+        files = [(f"{i}.py", 1) for i in range(5)]
+
+        self.assertEqual([len(chunk) for chunk in schedule(files, chunk_files=2)], [2, 2, 1])
+
+    def test_isolated_files(self) -> None:
+        files = [("a.py", 300), ("b.py", 100), ("c.py", 200)]
+
+        self.assertEqual(schedule(files, isolate_size=150), [["a.py"], ["c.py"], ["b.py"]])
+
+    def test_chunks_by_bytes(self) -> None:
+        files = [("large.py", 100), ("a.py", 30), ("b.py", 30), ("c.py", 30)]
+
+        self.assertEqual(
+            schedule(files, chunk_bytes=60), [["large.py"], ["a.py", "b.py"], ["c.py"]]
+        )
@@ -0,0 +1,73 @@
+import textwrap
+from unittest import TestCase
+
+import libcst as cst
+
+from codemods.mypy import DefaultFunctionReturnTypeCommand
+from codemods.scan import Match, scan_module
+from codemods.wxpython import (
+    MakeModalCommand,
+    SizerAddCommand,
+    WxPythonMigrationCommand,
+)
+
+
+class ScanModuleTests(TestCase):
+    def test_match(self) -> None:
+        module = cst.parse_module("sizer.AddWindow(panel)\nsizer.Add(panel)\n")
+
+        self.assertEqual(
+            scan_module(SizerAddCommand, module, "module.py"),
+            [
+                Match(
+                    file="module.py",
+                    line=1,
+                    column=0,
+                    command="wxpython.SizerAddCommand",
+                    old="sizer.AddWindow(panel)",
+                    new="sizer.Add(panel)",
+                )
+            ],
+        )
+
+    def test_changed_line(self) -> None:
+        module = cst.parse_module("def f():\n    pass\n")
+
+        matches = scan_module(DefaultFunctionReturnTypeCommand, module, "module.py")
+
+        self.assertEqual([(m.old, m.new) for m in matches], [("def f():", "def f() -> None:")])
+
+    def test_added_line(self) -> None:
+        module = cst.parse_module(
+            textwrap.dedent(
+                """
+                class MyModal(wx.Frame):
+                    def show(self):
+                        self.MakeModal()
+                """
+            )
+        )
+
+        matches = scan_module(MakeModalCommand, module, "module.py")
+
+        self.assertEqual(
+            [(m.line, m.old, m.new) for m in matches],
+            [(2, "", "def MakeModal(self, modal=True):")],
+        )
+
+    def test_fused_command(self) -> None:
+        module = cst.parse_module("wx.Color(sizer.AddWindow(panel))\n")
+
+        matches = scan_module(WxPythonMigrationCommand, module, "module.py")
+
+        self.assertEqual(
+            sorted(m.command for m in matches),
+            ["wxpython.ColorToColourCommand", "wxpython.SizerAddCommand"],
+        )
+
+    def test_tree_unchanged(self) -> None:
+        module = cst.parse_module("sizer.AddWindow(panel)\n")
+
+        scan_module(SizerAddCommand, module, "module.py")
+
+        self.assertEqual(module.code, "sizer.AddWindow(panel)\n")
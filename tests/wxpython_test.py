@@ -1,6 +1,7 @@
 import textwrap
 
-from libcst.codemod import CodemodTest
+import libcst as cst
+from libcst.codemod import CodemodContext, CodemodTest
 
 from codemods.wxpython import (
     ColorToColourCommand,
@@ -13,6 +14,7 @@ from codemods.wxpython import (
     MenuAppendCommand,
     SizerAddCommand,
     ToolbarAddToolCommand,
+    WxPythonMigrationCommand,
 )
 
 
@@ -77,6 +79,18 @@ class ConstantsRenameCommandTests(CodemodTest):
 
         self.assertCodemod(before, after)
 
+    def test_no_op_other_module(self) -> None:
+        before = "keys.WXK_PRIOR"
+        after = "keys.WXK_PRIOR"
+
+        self.assertCodemod(before, after)
+
+    def test_no_op_call_or_subscript_of_module(self) -> None:
+        before = "wx().OPEN\nwx(a=f()).WXK_NEXT\nwx['x'].FILE_MUST_EXIST\n"
+        after = "wx().OPEN\nwx(a=f()).WXK_NEXT\nwx['x'].FILE_MUST_EXIST\n"
+
+        self.assertCodemod(before, after)
+
 
 class FixImportFromAdvCommandTests(CodemodTest):
     TRANSFORM = FixImportFromAdvCommand
@@ -147,6 +161,12 @@ class FixImportFromAdvCommandTests(CodemodTest):
 
         self.assertCodemod(before, after)
 
+    def test_no_op_call_of_module(self) -> None:
+        before = "wx().DatePickerCtrl"
+        after = "wx().DatePickerCtrl"
+
+        self.assertCodemod(before, after)
+
 
 class FlexGridSizerCommandTests(CodemodTest):
     TRANSFORM = FlexGridSizerCommand
@@ -191,6 +211,12 @@ class MenuAppendCommandTests(CodemodTest):
 
         self.assertCodemod(before, after)
 
+    def test_keywords_substitution_of_deprecated_method(self) -> None:
+        before = "menu.AppendItem(menu_item)\nmenu.Append(1, text='Item', help='Help')\n"
+        after = "menu.Append(menu_item)\nmenu.Append(1, item='Item', helpString='Help')\n"
+
+        self.assertCodemod(before, after)
+
     def test_deprecated_method_substitution(self) -> None:
         before = "menu.AppendItem(menu_item)"
         after = "menu.Append(menu_item)"
@@ -229,6 +255,12 @@ class ToolbarAddToolCommandTests(CodemodTest):
 
         self.assertCodemod(before, after)
 
+    def test_no_op_without_renamed_keywords(self) -> None:
+        before = "toolbar.DoAddTool(1, label='Toolbar tool')"
+        after = "toolbar.DoAddTool(1, label='Toolbar tool')"
+
+        self.assertCodemod(before, after)
+
 
 class ListCtrlInsertColumnCommandTests(CodemodTest):
     TRANSFORM = ListCtrlInsertColumnCommand
@@ -273,6 +305,74 @@ class DeprecationWarningsCommandTests(CodemodTest):
 
         self.assertCodemod(before, after)
 
+    def test_imported_symbols_substitution_with_wx_imported(self) -> None:
+        before = textwrap.dedent(
+            """
+            import wx
+            from wx import BitmapFromImage, EmptyIcon
+
+            EmptyIcon()
+            """
+        )
+        after = textwrap.dedent(
+            """
+            import wx
+            from wx import BitmapFromImage
+
+            wx.Icon()
+            """
+        )
+
+        self.assertCodemod(before, after)
+
+    def test_nested_imported_symbols_substitution(self) -> None:
+        before = textwrap.dedent(
+            """
+            def f():
+                from wx import BitmapFromImage
+
+                return BitmapFromImage()
+            """
+        )
+        after = textwrap.dedent(
+            """
+            import wx
+
+            def f():
+
+                return wx.Bitmap()
+            """
+        )
+
+        self.assertCodemod(before, after)
+
+    def test_no_op_symbol_not_imported_from_wx(self) -> None:
+        before = "BitmapFromImage()"
+        after = "BitmapFromImage()"
+
+        self.assertCodemod(before, after)
+
+    def test_imports_of_previous_module_forgotten(self) -> None:
+        # The same instance transforming a second module
+        command = DeprecationWarningsCommand(CodemodContext())
+        command.transform_module(cst.parse_module("from wx import BitmapFromImage\n"))
+        before = textwrap.dedent(
+            """
+            def BitmapFromImage(x):
+                pass
+
+            BitmapFromImage(x)
+            """
+        )
+
+        self.assertEqual(command.transform_module(cst.parse_module(before)).code, before)
+
+    def test_no_op_call_or_subscript_of_module(self) -> None:
+        before = "wx['x'].EmptyIcon()\nwx().BitmapFromImage(image)\n"
+        after = "wx['x'].EmptyIcon()\nwx().BitmapFromImage(image)\n"
+
+        self.assertCodemod(before, after)
+
 
 class SizerAddWindowCommandTests(CodemodTest):
     TRANSFORM = SizerAddCommand
@@ -348,3 +448,130 @@ class MakeModalCommandTests(CodemodTest):
         )
 
         self.assertCodemod(before, after)
+
+    def test_substitution_once_for_many_calls(self) -> None:
+        before = textwrap.dedent(
+            """
+            class MyModal(wx.Frame):
+                def show(self):
+                    self.MakeModal()
+
+                def hide(self):
+                    self.MakeModal(False)
+            """
+        )
+        after = textwrap.dedent(
+            """
+            class MyModal(wx.Frame):
+                def show(self):
+                    self.MakeModal()
+
+                def hide(self):
+                    self.MakeModal(False)
+
+                def MakeModal(self, modal=True):
+                    if modal and not hasattr(self, '_disabler'):
+                        self._disabler = wx.WindowDisabler(self)
+                    if not modal and hasattr(self, '_disabler'):
+                        del self._disabler
+            """
+        )
+
+        self.assertCodemod(before, after)
+
+    def test_substitution_nested_class(self) -> None:
+        before = textwrap.dedent(
+            """
+            class MyFrame(wx.Frame):
+                class MyModal(wx.Frame):
+                    def show(self):
+                        self.MakeModal()
+            """
+        )
+        after = textwrap.dedent(
+            """
+            class MyFrame(wx.Frame):
+                class MyModal(wx.Frame):
+                    def show(self):
+                        self.MakeModal()
+
+                    def MakeModal(self, modal=True):
+                        if modal and not hasattr(self, '_disabler'):
+                            self._disabler = wx.WindowDisabler(self)
+                        if not modal and hasattr(self, '_disabler'):
+                            del self._disabler
+            """
+        )
+
+        self.assertCodemod(before, after)
+
+    def test_no_op_outside_class(self) -> None:
+        before = "self.MakeModal()"
+        after = "self.MakeModal()"
+
+        self.assertCodemod(before, after)
+
+
+class WxPythonMigrationCommandTests(CodemodTest):
+    TRANSFORM = WxPythonMigrationCommand
+
+    before = textwrap.dedent(
+        """
+        from wx import BitmapFromImage
+
+        class MyFrame(wx.Frame):
+            def __init__(self):
+                self.SetBackgroundColour(wx.Color(255, 255, 255))
+                self.MakeModal()
+
+                sizer = wx.FlexGridSizer(1, 0)
+                sizer.AddWindow(panel, 0, border=0, flag=wx.EXPAND)
+                menu.AppendItem(menu_item)
+                menu.Append(help="", id=1, text="Menu item")
+                toolbar.DoAddTool(bitmap=BitmapFromImage(image), id=1, label="Tool")
+                self.list_ctrl.InsertColumnInfo(0, info)
+                picker = wx.DatePickerCtrl(self, style=wx.DP_DROPDOWN)
+                dt = wx.DateTimeFromDMY(1, 1, 2000)
+
+                return wx.WXK_PRIOR
+        """
+    )
+    after = textwrap.dedent(
+        """
+        import wx.adv
+        import wx
+
+        class MyFrame(wx.Frame):
+            def __init__(self):
+                self.SetBackgroundColour(wx.Colour(255, 255, 255))
+                self.MakeModal()
+
+                sizer = wx.FlexGridSizer(1, 0, 0)
+                sizer.Add(panel, 0, border=0, flag=wx.EXPAND)
+                menu.Append(menu_item)
+                menu.Append(helpString="", id=1, item="Menu item")
+                toolbar.AddTool(bitmap=wx.Bitmap(image), toolId=1, label="Tool")
+                self.list_ctrl.InsertColumn(0, info)
+                picker = wx.adv.DatePickerCtrl(self, style=wx.adv.DP_DROPDOWN)
+                dt = wx.DateTime.FromDMY(1, 1, 2000)
+
+                return wx.WXK_PAGEUP
+
+            def MakeModal(self, modal=True):
+                if modal and not hasattr(self, '_disabler'):
+                    self._disabler = wx.WindowDisabler(self)
+                if not modal and hasattr(self, '_disabler'):
+                    del self._disabler
+        """
+    )
+
+    def test_substitution(self) -> None:
+        self.assertCodemod(self.before, self.after)
+
+    def test_same_output_of_sequential_commands(self) -> None:
+        code = self.before
+
+        for command in WxPythonMigrationCommand.COMMANDS:
+            code = command(CodemodContext()).transform_module(cst.parse_module(code)).code
+
+        self.assertCodemod(self.before, code)